@@ -0,0 +1,169 @@
+# ALT heuristic (A*, landmarks, triangle inequality)
+# Travel times to and from a few landmark nodes are precomputed; for any node v and
+# target t the triangle inequality gives d(v, t) >= d(L, t) - d(L, v) and
+# d(v, t) >= d(v, L) - d(t, L), so the largest of these bounds is an admissible and
+# consistent A* heuristic that is far tighter than straight-line distance / speed
+#
+# Usage: python alt.py build              pick landmarks and save graph.alt
+#        python alt.py compare [pairs]     nodes settled per query vs the T5 heuristic
+import mmap
+import struct
+import sys
+import time
+from array import array
+from math import inf
+from operator import sub
+from random import Random
+
+from geo import haversine_distance
+from graph import UNREACHABLE, edge_checksum
+
+MAGIC = b'NUBERLM\0'
+VERSION = 1
+
+# magic, version, nodes, landmarks, crc32 of the graph's edges
+HEADER = struct.Struct('<8sIqqI')
+
+LANDMARKS = 16
+
+# Stored in place of inf so differences of two unreachable entries stay finite
+FAR = 1e9
+
+
+class Landmarks:
+    def __init__(self, landmarks, forward, backward):
+        self.landmarks = landmarks            # Landmark node ids
+        self.count = len(landmarks)
+        self.forward = forward                # d(L, v) at forward[v * count + i], float32
+        self.backward = backward              # d(v, L) at backward[v * count + i], float32
+
+    # Lower bound on d(node, target) for every node, as a function for Graph.a_star
+    def estimator(self, target):
+        count, forward, backward = self.count, self.forward, self.backward
+        start = target * count
+        to_target = forward[start:start + count]          # d(L, t)
+        from_target = backward[start:start + count]       # d(t, L)
+
+        def estimate(node):
+            start = node * count
+            return max(0, *map(sub, to_target, forward[start:start + count]),
+                       *map(sub, backward[start:start + count], from_target))
+
+        return estimate
+
+
+# Pick landmarks by farthest selection: each new landmark is the reachable node
+# farthest (by travel time) from all landmarks chosen so far
+def select_landmarks(graph, count=LANDMARKS, seed=0):
+    start = Random(seed).randrange(len(graph))
+    nearest = graph.shortest_times(start)
+    landmarks = []
+    while len(landmarks) < count:
+        candidates = [(time, node) for node, time in enumerate(nearest)
+                      if time < inf and node not in landmarks]
+        if not candidates:
+            break
+        landmark = max(candidates)[1]
+        landmarks.append(landmark)
+        times = graph.shortest_times(landmark)
+        nearest = array('d', map(min, nearest, times)) if len(landmarks) > 1 else times
+    return landmarks
+
+
+# Precompute landmark distances in both directions for a Graph
+def build_landmarks(graph, count=LANDMARKS):
+    landmarks = select_landmarks(graph, count)
+    nodes, count = len(graph), len(landmarks)
+    forward = array('f', [0]) * (nodes * count)
+    backward = array('f', [0]) * (nodes * count)
+    reverse = graph.reverse()
+    for i, landmark in enumerate(landmarks):
+        for table, times in ((forward, graph.shortest_times(landmark)),
+                             (backward, reverse.shortest_times(landmark))):
+            for node, time in enumerate(times):
+                table[node * count + i] = time if time < inf else FAR
+    return Landmarks(landmarks, forward, backward)
+
+
+def save_landmarks(landmarks, graph, path='graph.alt'):
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(graph), landmarks.count, edge_checksum(graph)))
+        file.write(bytes(array('i', landmarks.landmarks)))
+        for table in (landmarks.forward, landmarks.backward):
+            file.write(bytes(-file.tell() % 8))
+            file.write(bytes(table))
+
+
+# Map saved landmark tables, None if missing or computed for a different graph
+def load_landmarks(graph, path='graph.alt'):
+    try:
+        with open(path, 'rb') as file:
+            buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+    magic, version, nodes, count, checksum = HEADER.unpack(buffer[:HEADER.size])
+    if (magic, version, nodes) != (MAGIC, VERSION, len(graph)) or checksum != edge_checksum(graph):
+        return None
+
+    position = HEADER.size + 4 * count
+    landmarks = list(buffer[HEADER.size:position].cast('i'))
+    tables = []
+    for _ in range(2):
+        position += -position % 8
+        tables.append(buffer[position:position + 4 * nodes * count].cast('f'))
+        position += 4 * nodes * count
+    return Landmarks(landmarks, *tables)
+
+
+# Load the landmark tables for a graph, building and saving them first if needed
+def open_landmarks(graph, path='graph.alt'):
+    landmarks = load_landmarks(graph, path)
+    if landmarks is None:
+        landmarks = build_landmarks(graph)
+        save_landmarks(landmarks, graph, path)
+    return landmarks
+
+
+# Nodes settled and time per query for Dijkstra, the T5 heuristic and ALT
+def compare(graph, landmarks, pairs=200):
+    # Unreachable pairs exhaust the whole component for every router, so leave them out
+    rng = Random(0)
+    queries = []
+    for _ in range(20 * pairs):
+        source, target = rng.randrange(len(graph)), rng.randrange(len(graph))
+        if graph.dijkstra(source, target) < UNREACHABLE:
+            queries.append((source, target))
+        if len(queries) == pairs:
+            break
+    pairs = len(queries)
+    average_speed_kmh = 30
+    routers = [
+        ('dijkstra', lambda s, t: graph.dijkstra(s, t)),
+        ('haversine/30', lambda s, t: graph.a_star(s, t, haversine_distance, average_speed_kmh)),
+        ('alt', lambda s, t: graph.a_star(s, t, estimate=landmarks.estimator(t))),
+    ]
+
+    expected = None
+    for name, router in routers:
+        graph.settled = 0
+        start = time.perf_counter()
+        results = [router(source, target) for source, target in queries]
+        elapsed = time.perf_counter() - start
+        expected = expected or results
+        wrong = sum(abs(a - b) > 1e-6 for a, b in zip(expected, results))
+        print(f"{name:>13}: {graph.settled / pairs:8.0f} settled/query, "
+              f"{elapsed / pairs * 1000:7.2f} ms/query, {wrong} differ from Dijkstra")
+
+
+if __name__ == "__main__":
+    from snapshot import open_graph
+
+    road_graph = open_graph()
+    if sys.argv[1:2] == ['build']:
+        started = time.perf_counter()
+        save_landmarks(build_landmarks(road_graph), road_graph)
+        print(f"Built graph.alt in {time.perf_counter() - started:.1f} s")
+    elif sys.argv[1:2] == ['compare']:
+        compare(road_graph, open_landmarks(road_graph), *map(int, sys.argv[2:3]))
+    else:
+        print("usage: python alt.py build | compare [pairs]")
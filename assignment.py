@@ -0,0 +1,56 @@
+# Minimum-cost bipartite assignment (Hungarian algorithm)
+# Shortest augmenting paths with row/column potentials, O(n^2 m) for an n x m
+# matrix with n <= m; every row of the smaller side is assigned exactly once
+from math import inf
+
+
+# Pairs (row, column) minimising the total cost of a rectangular cost matrix
+# costs is a list of rows; min(rows, columns) pairs are returned, sorted by row
+def assignment(costs):
+    if not costs or not costs[0]:
+        return []
+    transpose = len(costs) > len(costs[0])
+    if transpose:
+        costs = [list(column) for column in zip(*costs)]
+    n, m = len(costs), len(costs[0])
+
+    # 1-based, column 0 is the virtual start of each augmenting path
+    row_potential = [0.0] * (n + 1)
+    column_potential = [0.0] * (m + 1)
+    owner = [0] * (m + 1)          # Row assigned to each column, 0 if free
+    previous = [0] * (m + 1)       # Column before each column on the augmenting path
+
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        slack = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while owner[column]:
+            used[column] = True
+            current = owner[column]
+            row_costs, offset = costs[current - 1], row_potential[current]
+            delta, next_column = inf, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row_costs[j - 1] - offset - column_potential[j]
+                    if reduced < slack[j]:
+                        slack[j], previous[j] = reduced, column
+                    if slack[j] < delta:
+                        delta, next_column = slack[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    row_potential[owner[j]] += delta
+                    column_potential[j] -= delta
+                else:
+                    slack[j] -= delta
+            column = next_column
+
+        # Flip the assignments along the path back to the start
+        while column:
+            owner[column] = owner[previous[column]]
+            column = previous[column]
+
+    pairs = [(owner[j] - 1, j - 1) for j in range(1, m + 1) if owner[j]]
+    if transpose:
+        pairs = [(column, row) for row, column in pairs]
+    return sorted(pairs)
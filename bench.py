@@ -0,0 +1,172 @@
+# Benchmark suite: replays synthetic demand (demand.py) through every policy and
+# router and appends one JSON line per run to a results file, so runs on different
+# commits can be compared. Each run happens in its own process so peak RSS is its own
+#
+# Usage: python bench.py run [--sizes 1000,10000] [--policies P,...] [--routers R,...]
+#                            [--rate 1000] [--output bench_results.jsonl]
+#        python bench.py compare old.jsonl new.jsonl [--threshold 0.10]
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+from demand import generate
+from engine import POLICIES, ROUTERS, Algorithm
+from snapshot import open_graph
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+DATA_DIR = 'bench_data'
+
+# Fields that identify a configuration when comparing result files
+CONFIGURATION = ('policy', 'router', 'matcher', 'passengers', 'rate')
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # Bytes on macOS, KiB elsewhere
+
+
+# Trip files for a workload on the largest component, generated on first use
+def workload(passengers, rate, seed=0):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    stem = os.path.join(DATA_DIR, f'{passengers}_{rate:g}_{seed}_largest')
+    paths = stem + '_passengers.csv', stem + '_drivers.csv'
+    if not all(os.path.exists(path) for path in paths):
+        generate(list(open_graph().nodes(largest=True)), *paths, passengers, rate=rate,
+                 seed=seed)
+    return paths
+
+
+# Run one configuration in this process and return its result record
+def run_one(policy, router, matcher, passengers, rate):
+    passenger_file, driver_file = workload(passengers, rate)
+    algo = Algorithm(policy, router, matcher=matcher, seed=0, passenger_file=passenger_file,
+                     driver_file=driver_file, largest_component=True)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        algo.run()
+    wall = time.perf_counter() - start
+
+    searches = algo.path_cache.searches + algo.cost_matrix.searches
+    settled = algo.graph.total_settled() + (algo.hierarchy.settled if algo.hierarchy else 0)
+    pushes = algo.graph.total_pushes() + (algo.hierarchy.pushes if algo.hierarchy else 0)
+    wait, profit = algo.metrics()
+    return {
+        'commit': commit(),
+        'policy': policy,
+        'router': algo.router,
+        'matcher': matcher,
+        'passengers': passengers,
+        'rate': rate,
+        'wall_s': round(wall, 3),
+        'peak_rss_kb': peak_rss_kb(),
+        'searches': searches,
+        'searches_per_s': round(searches / wall, 1) if wall else None,
+        'nodes_settled': settled,
+        'heap_pushes': pushes,
+        'rides': algo.total_rides,
+        'd1_wait_min': round(wait, 3),
+        'd2_profit_min': round(profit, 3),
+    }
+
+
+# Every combination, each in a child process, appending records to output
+def run_all(sizes, policies, routers, matchers, rate, output):
+    for passengers in sizes:
+        workload(passengers, rate)  # Generate once, before the timed children start
+        for policy in policies:
+            for router in routers or [None]:
+                for matcher in matchers:
+                    command = [sys.executable, __file__, 'one', policy, router or '', matcher,
+                               str(passengers), str(rate)]
+                    child = subprocess.run(command, capture_output=True, text=True)
+                    if child.returncode:
+                        print(f"{policy} {router} {matcher} {passengers}: failed\n{child.stderr}")
+                        continue
+                    record = json.loads(child.stdout)
+                    with open(output, 'a') as file:
+                        file.write(json.dumps(record) + '\n')
+                    print(f"{policy:>16} {record['router']:>16} {matcher:>6} {passengers:>8}: "
+                          f"{record['wall_s']:8.2f} s, {record['peak_rss_kb'] or 0:>8} KiB, "
+                          f"{record['searches_per_s'] or 0:9.1f} searches/s, "
+                          f"{record['nodes_settled']:>12} settled")
+
+
+def load(path):
+    with open(path) as file:
+        return {tuple(record[field] for field in CONFIGURATION): record
+                for record in map(json.loads, file)}
+
+
+# Report wall time, nodes settled and peak RSS changes between two result files; returns the
+# number of configurations that got worse by more than threshold (relative)
+def compare(old_path, new_path, threshold=0.10):
+    old, new = load(old_path), load(new_path)
+    regressions = 0
+    for configuration in sorted(old.keys() & new.keys(), key=str):
+        changes = []
+        for field in ('wall_s', 'nodes_settled', 'peak_rss_kb'):
+            before, after = old[configuration][field], new[configuration][field]
+            if before and after is not None:
+                change = (after - before) / before
+                flag = ' REGRESSION' if change > threshold else ''
+                regressions += bool(flag)
+                changes.append(f"{field} {change * 100:+.1f}%{flag}")
+        print(' '.join(map(str, configuration)) + ': ' + ', '.join(changes))
+    return regressions
+
+
+def main(arguments):
+    if arguments[:1] == ['one']:
+        policy, router, matcher, passengers, rate = arguments[1:6]
+        print(json.dumps(run_one(policy, router or None, matcher, int(passengers), float(rate))))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmark the simulation on synthetic demand")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run')
+    run.add_argument('--sizes', default='1000', help="passenger counts, comma separated")
+    run.add_argument('--policies', default=','.join(POLICIES))
+    run.add_argument('--routers', default='', help=f"any of {','.join(ROUTERS)} "
+                                                  "(default: each policy's own)")
+    run.add_argument('--matchers', default='greedy')
+    run.add_argument('--rate', type=float, default=1000, help="passenger requests per hour")
+    run.add_argument('--output', default='bench_results.jsonl')
+    diff = commands.add_parser('compare')
+    diff.add_argument('old')
+    diff.add_argument('new')
+    diff.add_argument('--threshold', type=float, default=0.10)
+    options = parser.parse_args(arguments)
+
+    if options.command == 'compare':
+        return 1 if compare(options.old, options.new, options.threshold) else 0
+
+    def names(text):
+        return [name for name in text.split(',') if name]
+
+    run_all([int(size) for size in names(options.sizes)], names(options.policies),
+            names(options.routers), names(options.matchers), options.rate, options.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,55 @@
+# Benchmark of node numbering orders: builds the graph from the json files with node ids
+# in input (OSM key) order, breadth-first order and Hilbert curve order, and times the
+# same searches on each. Pairs are picked by key, so every layout answers the same queries
+#
+# Usage: python bench_layout.py [pairs] [adjacency.json] [node_data.json]
+import json
+import sys
+import time
+from random import Random
+
+from graph import ORDERS, UNREACHABLE, build_graph
+
+
+# Mean distance between the ids at the two ends of an edge, in nodes
+def edge_span(graph):
+    offsets, targets = graph.offsets, graph.targets
+    total = sum(abs(targets[edge] - node) for node in range(len(graph))
+                for edge in range(offsets[node], offsets[node + 1]))
+    return total / max(len(targets), 1)
+
+
+def main(pairs=200, adjacency_path='adjacency.json', node_path='node_data.json'):
+    with open(adjacency_path) as file:
+        adjacency = json.load(file)
+    with open(node_path) as file:
+        node_data = json.load(file)
+    graphs = {order: build_graph(adjacency, node_data, order) for order in reversed(ORDERS)}
+
+    # Reachable pairs of keys, so the timings are not dominated by exhausted searches
+    reference = graphs['input']
+    rng = Random(0)
+    queries = []
+    for _ in range(20 * pairs):
+        source, target = rng.choice(reference.keys), rng.choice(reference.keys)
+        if reference.dijkstra(reference.node_id(source), reference.node_id(target)) < UNREACHABLE:
+            queries.append((source, target))
+        if len(queries) == pairs:
+            break
+    print(f"{len(queries)} reachable pairs, {len(reference)} nodes, {len(reference.targets)} edges")
+
+    expected = None
+    for order, graph in graphs.items():
+        ids = [(graph.node_id(source), graph.node_id(target)) for source, target in queries]
+        graph.dijkstra(*ids[0])  # Warm up
+        start = time.perf_counter()
+        results = [graph.dijkstra(source, target) for source, target in ids]
+        elapsed = time.perf_counter() - start
+        expected = expected or results
+        wrong = sum(abs(a - b) > 1e-9 for a, b in zip(expected, results))
+        print(f"{order:>8}: mean edge span {edge_span(graph):9.1f} ids, "
+              f"{len(ids) / elapsed:8.1f} searches/s, {wrong} differ from input order")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]), *sys.argv[2:4])
@@ -0,0 +1,81 @@
+# Benchmark of the T5 matchers: greedy closest-pair dispatch against the batch
+# Hungarian assignment over a few window lengths, and both with candidate
+# pruning against the full ETA matrix, all on the same trips and seed
+# Reports D1 (average passenger wait), D2 (average ride profit), driver-passenger
+# travel times requested and wall-clock time
+#
+# Usage: python bench_matching.py [passengers] [windows in seconds...]
+#        python bench_matching.py prune [passengers] [k...] [--tolerance 0.05]
+import contextlib
+import io
+import sys
+import time
+
+from engine import Algorithm
+
+
+# Runs snap to the largest strongly connected component, so every pickup has a route and
+# D1 is not dominated by unreachable pairs
+def run(limit, **options):
+    # The same seed sends the same drivers off duty in every run
+    algo = Algorithm(limit=limit, seed=0, largest_component=True, **options)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        algo.run()
+    return algo, time.perf_counter() - start
+
+
+def report(name, algo, elapsed):
+    wait, profit = algo.metrics()
+    print(f"{name:>11}  {wait:10.2f}  {profit:10.2f}  {algo.total_rides:5d}  "
+          f"{algo.cost_matrix.pairs_timed:8d}  {elapsed:6.2f}s")
+    return wait
+
+
+def header():
+    print(f"{'matcher':>11}  {'D1 wait':>10}  {'D2 profit':>10}  {'rides':>5}  "
+          f"{'ETAs':>8}  {'time':>7}")
+
+
+def main(limit=200, *windows):
+    header()
+    report('greedy', *run(limit))
+    for window in windows or (10, 30, 60):
+        report(f'batch {window:g}s', *run(limit, matcher='batch', window=window))
+
+
+# Greedy and batch with only the k nearest candidates timed (and batch within a 0.5 km
+# radius) must keep D1 within tolerance (relative) of the same matcher over the full
+# matrix; returns False if any run falls outside
+def check_pruning(limit=200, candidates=(4, 8, 16), tolerance=0.05):
+    header()
+    passed = True
+    for matcher in ('greedy', 'batch'):
+        expected = report(matcher, *run(limit, matcher=matcher))
+        runs = [(f'k={k}', {'candidates': k}) for k in candidates]
+        if matcher == 'batch':
+            runs = [(f'batch {name}', options) for name, options in runs]
+            runs.append(('batch 0.5km', {'radius_km': 0.5}))
+        for name, options in runs:
+            wait = report(name, *run(limit, matcher=matcher, **options))
+            difference = (wait - expected) / expected if expected else 0
+            within = abs(difference) <= tolerance
+            passed = passed and within
+            print(f"{'':>11}  D1 {difference * 100:+.2f}% vs {matcher}, "
+                  f"{'within' if within else 'OUTSIDE'} {tolerance * 100:g}% tolerance")
+    return passed
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    if arguments[:1] == ['prune']:
+        tolerance = 0.05
+        if '--tolerance' in arguments:
+            position = arguments.index('--tolerance')
+            tolerance = float(arguments[position + 1])
+            del arguments[position:position + 2]
+        counts = [int(argument) for argument in arguments[1:]]
+        passed = check_pruning(*counts[:1], *([counts[1:]] if counts[1:] else []),
+                               tolerance=tolerance)
+        sys.exit(0 if passed else 1)
+    main(*map(int, arguments[:1]), *map(float, arguments[1:]))
@@ -0,0 +1,79 @@
+# Benchmark of point-to-point routers on random reachable node pairs: Dijkstra and the
+# T5 haversine A* against their bidirectional versions, and heapq against the radix heap
+# on decisecond edge times, all on the static edge times of one hourly slot so every
+# router answers the same question
+# The exact routers must agree with Dijkstra and the radix heap with Dijkstra on the same
+# rounded edge times; T5's A* at 30 km/h may overestimate and is only reported
+# Exits 1 on a mismatch
+#
+# Usage: python bench_routing.py [pairs] [slot]
+import sys
+import time
+from random import Random
+
+from geo import haversine_distance
+from array import array
+
+from graph import DECISECONDS_PER_HOUR, UNREACHABLE, Graph
+from snapshot import open_graph
+
+AVERAGE_SPEED_KMH = 30
+
+
+# Random pairs with a route between them, unreachable ones being answered without a search
+def reachable_pairs(graph, pairs):
+    rng = Random(0)
+    queries = []
+    for _ in range(20 * pairs):
+        source, target = rng.randrange(len(graph)), rng.randrange(len(graph))
+        if graph.dijkstra(source, target) < UNREACHABLE:
+            queries.append((source, target))
+        if len(queries) == pairs:
+            break
+    return queries
+
+
+def main(pairs=200, slot=8):
+    graph = open_graph().at_slot(slot)
+    queries = reachable_pairs(graph, pairs)
+    pairs = len(queries)
+    speed = graph.haversine_speed()
+    rounded = Graph(graph.keys, graph.lon, graph.lat, graph.offsets, graph.targets,
+                    array('d', [weight / DECISECONDS_PER_HOUR
+                                for weight in graph.quantized_weights()]),
+                    graph.hourly, graph.index, graph.component, graph.reach)
+    rounded_times = [rounded.dijkstra(source, target) for source, target in queries]
+    # (name, router, times it must agree with or None if it is only reported)
+    routers = [
+        ('dijkstra', lambda s, t: graph.dijkstra(s, t), None),
+        ('dijkstra_radix', graph.dijkstra_radix, rounded_times),
+        ('bidirectional', lambda s, t: graph.bidirectional(s, t), 'dijkstra'),
+        ('a_star', lambda s, t: graph.a_star(s, t, haversine_distance, AVERAGE_SPEED_KMH), None),
+        ('bidirectional_a_star',
+         lambda s, t: graph.bidirectional(s, t, haversine_distance, speed), 'dijkstra'),
+    ]
+
+    print(f"{pairs} reachable pairs, {len(graph)} nodes, slot {slot}, "
+          f"top edge speed {speed:.1f} km/h")
+    expected, agree = None, True
+    for name, router, reference in routers:
+        graph.settled = 0
+        start = time.perf_counter()
+        results = [router(source, target) for source, target in queries]
+        elapsed = time.perf_counter() - start
+        expected = expected or results
+        error = max(abs(a - b) for a, b in zip(expected, results))
+        verdict = ''
+        if reference is not None:
+            reference = expected if reference == 'dijkstra' else reference
+            matches = all(abs(a - b) <= 1e-9 for a, b in zip(reference, results))
+            verdict = ', agrees' if matches else ', MISMATCH'
+            agree = agree and matches
+        print(f"{name:>20}: {graph.settled / pairs:8.0f} settled/query, "
+              f"{elapsed / pairs * 1000:7.2f} ms/query, "
+              f"differs from Dijkstra by up to {error * 3600:.2f} s{verdict}")
+    return agree
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(*map(int, sys.argv[1:3])) else 1)
@@ -0,0 +1,55 @@
+# Benchmark of closest-node lookups: the k-d tree in spatial.py against the
+# longitude-window search used by T4/T5, with a brute-force haversine scan as ground truth
+#
+# Usage: python bench_spatial.py [queries]
+import sys
+import time
+from random import Random
+
+from geo import haversine_distance
+from snapshot import open_graph
+from spatial import SpatialIndex, WindowIndex
+
+
+def brute_force_closest_node(lon, lat, nodes):
+    return min(nodes, key=lambda node: haversine_distance(node[0], node[1], lon, lat))
+
+
+def timed(function, queries):
+    start = time.perf_counter()
+    results = [function(lon, lat) for lon, lat in queries]
+    return results, time.perf_counter() - start
+
+
+def main(count=2000):
+    nodes = list(open_graph().nodes())
+    # The original T5 lookup: binary search on longitude, then scan +-20 entries
+    window_index = WindowIndex(nodes, haversine_distance)
+
+    start = time.perf_counter()
+    index = SpatialIndex(nodes)
+    build_time = time.perf_counter() - start
+
+    # Query points spread over the bounding box of the network
+    rng = Random(0)
+    lons, lats = [node[0] for node in nodes], [node[1] for node in nodes]
+    queries = [(rng.uniform(min(lons), max(lons)), rng.uniform(min(lats), max(lats)))
+               for _ in range(count)]
+
+    truth, brute_time = timed(lambda lon, lat: brute_force_closest_node(lon, lat, nodes),
+                              queries[:200])
+    window, window_time = timed(window_index.nearest, queries)
+    tree, tree_time = timed(index.nearest, queries)
+
+    window_hits = sum(w[2] == t[2] for w, t in zip(window, truth))
+    tree_hits = sum(k[2] == t[2] for k, t in zip(tree, truth))
+    print(f"{len(nodes)} nodes, k-d tree built in {build_time:.2f} s")
+    print(f"brute force: {brute_time / len(truth) * 1e6:.0f} us/query")
+    print(f"window:      {window_time / count * 1e6:.0f} us/query, "
+          f"{window_hits}/{len(truth)} exact")
+    print(f"k-d tree:    {tree_time / count * 1e6:.0f} us/query, "
+          f"{tree_hits}/{len(truth)} exact")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
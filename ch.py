@@ -0,0 +1,260 @@
+# Contraction Hierarchies over the road network
+# Nodes are contracted one at a time in order of importance, adding shortcut edges
+# wherever a shortest path ran through the removed node. A query is then a
+# bidirectional Dijkstra that only ever moves to more important nodes, which
+# settles a few hundred nodes instead of a large part of the city
+#
+# Usage: python ch.py build            contract graph.snapshot into graph.ch
+#        python ch.py check [pairs]     compare against Dijkstra and time both
+import mmap
+import struct
+import sys
+import time
+from array import array
+from heapq import heappop, heappush
+from math import inf
+from random import Random
+
+from graph import UNREACHABLE, edge_checksum
+
+MAGIC = b'NUBERCH\0'
+VERSION = 1
+
+# magic, version, nodes, upward edges, downward edges, crc32 of the graph's edges
+HEADER = struct.Struct('<8sIqqqI')
+
+# Witness searches give up after settling this many nodes and add the shortcut instead
+WITNESS_SETTLE_LIMIT = 60
+
+
+class ContractionHierarchy:
+    def __init__(self, up_offsets, up_targets, up_weights, down_offsets, down_targets, down_weights):
+        # Upward edges u -> v with rank[v] > rank[u], used by the forward search
+        self.up = (up_offsets, up_targets, up_weights)
+        # Reversed edges v -> u with rank[v] > rank[u], used by the backward search
+        self.down = (down_offsets, down_targets, down_weights)
+        self.settled = 0                      # Nodes settled by all queries so far
+        self.pushes = 0                       # Priority queue pushes by all queries so far
+
+    # Shortest travel time between two node ids, drop-in for Graph.dijkstra/a_star
+    def query(self, source, target):
+        if source < 0 or target < 0:
+            return UNREACHABLE
+        if source == target:
+            return 0
+        searches = (self.up, self.down)
+        times = ({source: 0}, {target: 0})
+        queues = ([(0, source)], [(0, target)])
+        self.pushes += 2
+        best = inf
+
+        while queues[0] or queues[1]:
+            # Expand the direction with the smaller queue head
+            side = 0 if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]) else 1
+            current_time, node = heappop(queues[side])
+            if current_time >= best:
+                queues[side].clear()  # Nothing left in this direction can improve the result
+                continue
+            if current_time > times[side][node]:
+                continue  # Stale queue entry
+
+            self.settled += 1
+            other = times[1 - side].get(node)
+            if other is not None and current_time + other < best:
+                best = current_time + other
+
+            offsets, targets, weights = searches[side]
+            side_times = times[side]
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                new_time = current_time + weights[edge]
+                if new_time < side_times.get(neighbor, inf):
+                    side_times[neighbor] = new_time
+                    heappush(queues[side], (new_time, neighbor))
+                    self.pushes += 1
+
+        return best if best < UNREACHABLE else UNREACHABLE
+
+
+# Dijkstra from source that ignores the node being contracted, stopping once all
+# targets are settled, past max_time, or after WITNESS_SETTLE_LIMIT nodes
+def witness_search(out_edges, source, skip, targets, max_time):
+    time = {source: 0}
+    priority_queue = [(0, source)]
+    remaining = set(targets)
+    settled = 0
+
+    while priority_queue and remaining and settled < WITNESS_SETTLE_LIMIT:
+        current_time, node = heappop(priority_queue)
+        if current_time > time[node]:
+            continue
+        if current_time > max_time:
+            break
+        remaining.discard(node)
+        settled += 1
+        for neighbor, weight in out_edges[node].items():
+            new_time = current_time + weight
+            if neighbor != skip and new_time < time.get(neighbor, inf):
+                time[neighbor] = new_time
+                heappush(priority_queue, (new_time, neighbor))
+    return time
+
+
+# Shortcuts (u, w, time) needed if node were removed from the remaining graph
+def needed_shortcuts(out_edges, in_edges, node):
+    shortcuts = []
+    outgoing = out_edges[node]
+    for u, in_time in in_edges[node].items():
+        targets = [w for w in outgoing if w != u]
+        if not targets:
+            continue
+        witness = witness_search(out_edges, u, node, targets,
+                                 in_time + max(outgoing[w] for w in targets))
+        for w in targets:
+            via = in_time + outgoing[w]
+            if witness.get(w, inf) > via:
+                shortcuts.append((u, w, via))
+    return shortcuts
+
+
+# Contraction order key: edge difference plus the number of contracted neighbors
+def importance(out_edges, in_edges, deleted, node):
+    shortcuts = len(needed_shortcuts(out_edges, in_edges, node))
+    return shortcuts - len(out_edges[node]) - len(in_edges[node]) + deleted[node]
+
+
+# Pack per-node edge lists into CSR arrays
+def to_csr(edge_lists):
+    offsets, targets, weights = array('i', [0]), array('i'), array('d')
+    for edges in edge_lists:
+        for target, weight in edges:
+            targets.append(target)
+            weights.append(weight)
+        offsets.append(len(targets))
+    return offsets, targets, weights
+
+
+# Contract every node of a Graph into a ContractionHierarchy
+def build_hierarchy(graph, progress=None):
+    nodes = len(graph)
+    out_edges = [{} for _ in range(nodes)]
+    in_edges = [{} for _ in range(nodes)]
+    for node in range(nodes):
+        for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+            neighbor, weight = graph.targets[edge], graph.weights[edge]
+            if neighbor != node and weight < out_edges[node].get(neighbor, inf):
+                out_edges[node][neighbor] = in_edges[neighbor][node] = weight
+
+    deleted = [0] * nodes
+    queue = [(importance(out_edges, in_edges, deleted, node), node) for node in range(nodes)]
+    queue.sort()
+    up_lists = [[] for _ in range(nodes)]
+    down_lists = [[] for _ in range(nodes)]
+    contracted = 0
+
+    while queue:
+        _, node = heappop(queue)
+        # Lazy update: re-evaluate and put back if it is no longer the least important
+        priority = importance(out_edges, in_edges, deleted, node)
+        if queue and priority > queue[0][0]:
+            heappush(queue, (priority, node))
+            continue
+
+        shortcuts = needed_shortcuts(out_edges, in_edges, node)
+        # Remaining neighbors all end up ranked above this node
+        for neighbor, weight in out_edges[node].items():
+            up_lists[node].append((neighbor, weight))
+            del in_edges[neighbor][node]
+            deleted[neighbor] += 1
+        for neighbor, weight in in_edges[node].items():
+            down_lists[node].append((neighbor, weight))
+            del out_edges[neighbor][node]
+            deleted[neighbor] += 1
+        out_edges[node], in_edges[node] = {}, {}
+
+        for u, w, via in shortcuts:
+            if via < out_edges[u].get(w, inf):
+                out_edges[u][w] = in_edges[w][u] = via
+
+        contracted += 1
+        if progress and contracted % 5000 == 0:
+            progress(contracted, nodes)
+
+    return ContractionHierarchy(*to_csr(up_lists), *to_csr(down_lists))
+
+
+def save_hierarchy(hierarchy, graph, path='graph.ch'):
+    up_offsets, up_targets, up_weights = hierarchy.up
+    down_offsets, down_targets, down_weights = hierarchy.down
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(up_offsets) - 1, len(up_targets),
+                               len(down_targets), edge_checksum(graph)))
+        for section in (up_offsets, up_targets, up_weights, down_offsets, down_targets, down_weights):
+            file.write(bytes(-file.tell() % 8))
+            file.write(bytes(section))
+
+
+# Map a saved hierarchy, None if it is missing or was built from a different graph
+def load_hierarchy(graph, path='graph.ch'):
+    try:
+        with open(path, 'rb') as file:
+            buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+    magic, version, nodes, up_edges, down_edges, checksum = HEADER.unpack(buffer[:HEADER.size])
+    if (magic, version, nodes) != (MAGIC, VERSION, len(graph)) or checksum != edge_checksum(graph):
+        return None
+
+    sections = []
+    position = HEADER.size
+    for typecode, length in (('i', nodes + 1), ('i', up_edges), ('d', up_edges),
+                             ('i', nodes + 1), ('i', down_edges), ('d', down_edges)):
+        position += -position % 8
+        size = length * struct.calcsize(typecode)
+        sections.append(buffer[position:position + size].cast(typecode))
+        position += size
+    return ContractionHierarchy(*sections)
+
+
+# Load the hierarchy for a graph, building and saving it first if needed
+def open_hierarchy(graph, path='graph.ch'):
+    hierarchy = load_hierarchy(graph, path)
+    if hierarchy is None:
+        hierarchy = build_hierarchy(graph)
+        save_hierarchy(hierarchy, graph, path)
+    return hierarchy
+
+
+# Compare CH queries with plain Dijkstra on random pairs and time both
+def check(graph, hierarchy, pairs=200):
+    rng = Random(0)
+    queries = [(rng.randrange(len(graph)), rng.randrange(len(graph))) for _ in range(pairs)]
+
+    start = time.perf_counter()
+    expected = [graph.dijkstra(source, target) for source, target in queries]
+    dijkstra_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = [hierarchy.query(source, target) for source, target in queries]
+    ch_time = time.perf_counter() - start
+
+    mismatches = sum(abs(a - b) > 1e-9 for a, b in zip(expected, found))
+    print(f"{pairs} random pairs, {mismatches} mismatches against Dijkstra")
+    print(f"dijkstra: {dijkstra_time / pairs * 1000:.3f} ms/query")
+    print(f"ch:       {ch_time / pairs * 1000:.3f} ms/query")
+    return mismatches
+
+
+if __name__ == "__main__":
+    from snapshot import open_graph
+
+    road_graph = open_graph()
+    if sys.argv[1:2] == ['build']:
+        started = time.perf_counter()
+        built = build_hierarchy(road_graph, lambda done, total: print(f"{done}/{total} contracted"))
+        save_hierarchy(built, road_graph)
+        print(f"Built graph.ch in {time.perf_counter() - started:.1f} s, "
+              f"{len(built.up[1]) + len(built.down[1])} edges")
+    elif sys.argv[1:2] == ['check']:
+        check(road_graph, open_hierarchy(road_graph), *map(int, sys.argv[2:3]))
+    else:
+        print("usage: python ch.py build | check [pairs]")
@@ -0,0 +1,61 @@
+# Synthetic trip files on the road network's footprint
+# Pickups, dropoffs and driver logins are positions of nodes in the largest strongly
+# connected component with a little jitter, so every trip can have a route,
+# and arrivals follow a Poisson process at a given rate, written in the format of
+# passengers.csv and drivers.csv so the simulation replays them like the real files
+#
+# Usage: python demand.py passengers [drivers] [rate per hour] [seed]
+#        writes demand_passengers.csv and demand_drivers.csv
+import csv
+import datetime
+import sys
+from random import Random
+
+from snapshot import open_graph
+
+# About 50 m of jitter around a node position, in degrees
+JITTER_DEG = 0.0005
+
+TIMESTAMP = '%m/%d/%Y %H:%M:%S'
+
+
+# Timestamps of count arrivals at rate per hour from start, in order
+def arrival_times(rng, count, rate, start):
+    seconds = 0.0
+    for _ in range(count):
+        seconds += rng.expovariate(rate / 3600)
+        yield (start + datetime.timedelta(seconds=int(seconds))).strftime(TIMESTAMP)
+
+
+# Write passengers and drivers rows for the nodes' footprint; drivers log in at
+# the rate that spreads them over the same period as the passengers
+def generate(nodes, passenger_path, driver_path, passengers=1000, drivers=None, rate=1000,
+             seed=0, start=datetime.datetime(2014, 4, 25)):
+    rng = Random(seed)
+    positions = [(lat, lon) for lon, lat, _ in nodes]
+    drivers = max(1, passengers // 5) if drivers is None else drivers
+
+    def position():
+        lat, lon = rng.choice(positions)
+        return (round(lat + rng.uniform(-JITTER_DEG, JITTER_DEG), 6),
+                round(lon + rng.uniform(-JITTER_DEG, JITTER_DEG), 6))
+
+    with open(passenger_path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['Date/Time', 'Source Lat', 'Source Lon', 'Dest Lat', 'Dest Lon'])
+        for timestamp in arrival_times(rng, passengers, rate, start):
+            writer.writerow([timestamp, *position(), *position()])
+
+    with open(driver_path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['Date/Time', 'Source Lat', 'Source Lon'])
+        for timestamp in arrival_times(rng, drivers, rate * drivers / max(passengers, 1), start):
+            writer.writerow([timestamp, *position()])
+
+
+if __name__ == "__main__":
+    counts = [int(argument) for argument in sys.argv[1:2] + sys.argv[2:3]]
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    generate(list(open_graph().nodes(largest=True)), 'demand_passengers.csv', 'demand_drivers.csv',
+             *counts, rate=rate, seed=seed)
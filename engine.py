@@ -0,0 +1,555 @@
+# Rideshare simulation engine shared by T1-T5
+# Every strategy runs on the same event queue, streaming trip loader, path cache and
+# matching structures; a policy picks what pairs drivers with passengers, which
+# router times the trips and how positions are snapped to road nodes
+#
+# Usage: python engine.py --policy fifo|straight_line|network|a_star|haversine_a_star
+#                         [--router R] [--snap kdtree|window] [--matcher greedy|batch] ...
+#        python engine.py --help    for every option
+import argparse
+import datetime
+from math import exp
+from itertools import groupby
+from operator import itemgetter
+from random import Random
+
+from alt import open_landmarks
+from assignment import assignment
+from ch import open_hierarchy
+from eta_pool import EtaPool
+from event_log import DRIVER_EXIT, DRIVER_RETURN, MATCH, VERBOSITY, EventLog
+from event_log import DROPOFF as LOG_DROPOFF, PICKUP as LOG_PICKUP
+from events import BATCH, DRIVER_LOGIN, DROPOFF, PASSENGER_ARRIVAL, PICKUP, EventQueue
+from fleet import BUSY, READY, Drivers, Passengers
+from geo import euclidean_distance, haversine_distance
+from graph import UNREACHABLE, WEEK_HOURS, week_slot
+from matching import ArrivalOrder, CostMatrix, StraightLineMatrix
+from path_cache import PathCache
+from profiler import Profiler
+from snapshot import open_graph
+from spatial import SpatialIndex, WindowIndex
+from trip_stream import read_rows, snapped_rows
+
+# Policies of T1-T5 as (pairing cost, router, snapping)
+# Pairing costs: 'arrival' pairs the longest-idle driver with the longest-waiting passenger,
+# 'distance' the closest pair in a straight line, 'eta' the pair with the least pickup time
+POLICIES = {
+    'fifo': ('arrival', 'dijkstra', 'window'),                      # T1
+    'straight_line': ('distance', 'dijkstra', 'window'),            # T2
+    'network': ('eta', 'dijkstra', 'window'),                       # T3
+    'a_star': ('eta', 'euclidean_a_star', 'window'),                # T4
+    'haversine_a_star': ('eta', 'a_star', 'kdtree'),                # T5
+}
+
+COST_MATRICES = {'arrival': ArrivalOrder, 'distance': StraightLineMatrix, 'eta': CostMatrix}
+
+ROUTERS = ('dijkstra', 'euclidean_a_star', 'a_star', 'alt', 'ch', 'bidirectional',
+           'bidirectional_a_star')
+
+# Unit conversion for simplicity
+def convert_date(time_obj):
+    return (time_obj.year * 8760 + time_obj.month * 730 + 
+            24 * time_obj.day + time_obj.hour + time_obj.minute / 60)
+
+class Algorithm:
+    # policy is one of POLICIES; router and snap override the policy's choices
+    # router picks how point-to-point queries are answered: 'dijkstra', 'euclidean_a_star'
+    # (T4), 'a_star' with the haversine heuristic (T5), 'alt' with the landmark heuristic
+    # from graph.alt, 'ch' for the Contraction Hierarchy in graph.ch, or 'bidirectional'
+    # and 'bidirectional_a_star' (haversine over the hour's top edge speed) searching from
+    # both ends; it times trips, while the cost matrix's pickup ETAs are always Dijkstra
+    # on the hour's edge times
+    # queue 'radix' runs the 'dijkstra' router on a radix heap over decisecond edge times
+    # of the departure hour instead of heapq
+    # snap 'kdtree' finds the exact closest node, 'window' the closest of the nodes next
+    # to the position in longitude order by Euclidean distance (T1-T4)
+    # largest_component snaps only to nodes of the largest strongly connected component,
+    # so every pickup and trip has a route
+    # limit caps the number of passengers read from passengers.csv (default: all of them)
+    # matcher 'greedy' dispatches the closest pair as soon as both are waiting; 'batch'
+    # collects requests for window seconds and dispatches the optimal assignment
+    # candidates (k) and radius_km limit pickup ETAs to the nearest idle drivers per
+    # passenger (and nearest passengers per driver) by straight-line distance
+    # workers > 1 runs the searches of drivers/passengers added together on a process pool;
+    # greedy matching adds them one event at a time, so in practice only batch windows
+    # and the batch matrix fill of pruned pairs reach it
+    # seed fixes the random draws of continue_driving, whose decay rate is per hour driven
+    # passenger_file and driver_file are the trip files to replay
+    # profiler (a profiler.Profiler) times the hot paths of each run; None costs nothing
+    # event_log (an event_log.EventLog) records matches, pickups, dropoffs and drivers
+    # going off duty; None records nothing
+    def __init__(self, policy='haversine_a_star', router=None, snap=None, limit=None,
+                 matcher='greedy', window=30, candidates=None, radius_km=None, workers=1,
+                 seed=None, decay=0.5, passenger_file='passengers.csv',
+                 driver_file='drivers.csv', profiler=None, event_log=None,
+                 largest_component=False, queue='heap'):
+        self.policy = policy
+        self.cost, default_router, default_snap = POLICIES[policy]
+        router = router or default_router
+        self.snap = snap or default_snap
+        self.largest_component = largest_component
+        self.datetime = datetime.datetime(2014, 4, 25, 0, 0, 0)
+        self.time = self.time_origin = convert_date(self.datetime)
+        self.limit = limit
+        self.passenger_file = passenger_file
+        self.driver_file = driver_file
+        self.load_data()
+        
+        self.total_passengers = 0
+        self.wait_time = self.driving_for_pickup = 0
+        self.driving_passengers = self.total_rides = 0
+        self.node_index = None
+        # Routed times and the cost matrix's pickup ETAs (exact Dijkstra on one hour's
+        # edge times) are different quantities, so they are cached apart
+        self.path_cache = PathCache()
+        self.eta_cache = PathCache()
+        self.router = router
+        self.queue = queue
+        self.matcher = matcher
+        self.window = window / 3600  # Hours
+        self.candidates = candidates
+        self.radius_km = radius_km
+        self.workers = workers
+        self.rng = Random(seed)
+        self.decay = decay
+        self.profiler = profiler
+        self.event_log = event_log
+        self.hierarchy = open_hierarchy(self.graph) if router == 'ch' else None
+        self.landmarks = open_landmarks(self.graph) if router == 'alt' else None
+
+    # Travel time between two node ids with the configured router
+    # Dijkstra and A* follow the hourly speed tables from the departure time (default:
+    # now); the CH and landmark indexes are built on the static edge times, and the
+    # bidirectional searches use the edge times of the departure hour
+    # Results are kept in the path cache keyed on the nodes and the hour
+    def route(self, source, target, departure_time=None):
+        average_speed_kmh = 30
+        if departure_time is None:
+            departure_time = self.time
+        if self.graph.unreachable(source, target):
+            return UNREACHABLE
+        departure = self.week_hour(departure_time)
+        if self.router == 'ch':
+            search = lambda: self.hierarchy.query(source, target)
+        elif self.router == 'alt':
+            search = lambda: self.graph.a_star(source, target,
+                                               estimate=self.landmarks.estimator(target))
+        elif self.router == 'dijkstra' and self.queue == 'radix':
+            slot_graph = self.graph.at_slot(week_slot(departure))
+            search = lambda: slot_graph.dijkstra_radix(source, target)
+        elif self.router == 'dijkstra':
+            search = lambda: self.graph.dijkstra(source, target, departure)
+        elif self.router == 'bidirectional':
+            slot_graph = self.graph.at_slot(week_slot(departure))
+            search = lambda: slot_graph.bidirectional(source, target)
+        elif self.router == 'bidirectional_a_star':
+            slot_graph = self.graph.at_slot(week_slot(departure))
+            search = lambda: slot_graph.bidirectional(source, target, haversine_distance,
+                                                      slot_graph.haversine_speed())
+        elif self.router == 'euclidean_a_star':
+            search = lambda: self.graph.a_star(source, target, euclidean_distance,
+                                               departure=departure)
+        else:
+            search = lambda: self.graph.a_star(source, target, haversine_distance, average_speed_kmh,
+                                               departure=departure)
+        return self.path_cache.lookup(source, target, departure_time, search)
+
+    # Hours since Monday 00:00 for a simulation time, which indexes the hourly speed tables
+    # convert_date is only linear within a month, so times are taken relative to self.datetime
+    def week_hour(self, time):
+        origin = self.datetime
+        return (origin.weekday() * 24 + origin.hour + origin.minute / 60 +
+                time - self.time_origin) % WEEK_HOURS
+
+    # Load data
+    # Trip files are streamed during the run (see trip_streams), only the graph is loaded here
+    def load_data(self):
+        self.graph = open_graph()  # Compiles graph.snapshot on first use
+
+    # Preprocess nodes for spatial searching - exact nearest node queries via a k-d tree,
+    # or nodes sorted by longitude for the window search
+    # Built once and kept across runs; an index built elsewhere can be assigned instead
+    def preprocess_nodes(self):
+        if self.node_index is None:
+            nodes = self.graph.nodes(self.largest_component)
+            if self.snap == 'window':
+                self.node_index = WindowIndex(nodes, euclidean_distance)
+            else:
+                self.node_index = SpatialIndex(nodes)
+
+    # Passenger and driver rows, read lazily in time order with every pickup, dropoff
+    # and driver position snapped to its closest node: passenger rows gain
+    # [pickup, dropoff] and driver rows [position] as (lon, lat, key) nodes
+    def trip_streams(self):
+        passengers = snapped_rows(read_rows(self.passenger_file, self.limit), self.node_index,
+                                  [(1, 2), (3, 4)])
+        drivers = snapped_rows(read_rows(self.driver_file), self.node_index, [(1, 2)])
+        return passengers, drivers
+
+    # Queue the next row of a stream as an event, False once the stream is exhausted
+    def queue_next(self, events, stream, kind):
+        row = next(stream, None)
+        if row is None:
+            return False
+        events.push(row[0], kind, row)
+        return True
+
+    # Hand the drivers and passengers that became ready since the last call to the
+    # cost matrix in the order they did; each run of consecutive drivers (or
+    # passengers) is timed in one call, which spreads its searches over the pool
+    # grouped adds all drivers and all passengers in two calls however they interleave,
+    # first the side that leaves fewer searches (an entry is searched only when the
+    # other side is not empty); the batch matrix does not depend on the order
+    # arrivals holds (is driver, id) pairs
+    def add_arrivals(self, grouped=False):
+        drivers, passengers = self.drivers, self.passengers
+        arrivals = self.arrivals
+        if grouped:
+            new_drivers = sum(is_driver for is_driver, _ in arrivals)
+            new_passengers = len(arrivals) - new_drivers
+            old_drivers = len(self.cost_matrix.drivers)
+            old_passengers = len(self.cost_matrix.passengers)
+            drivers_first = (new_drivers * bool(old_passengers) +
+                             new_passengers * bool(old_drivers + new_drivers))
+            passengers_first = (new_passengers * bool(old_drivers) +
+                                new_drivers * bool(old_passengers + new_passengers))
+            arrivals = sorted(arrivals, key=itemgetter(0),
+                              reverse=drivers_first <= passengers_first)
+        for is_driver, run in groupby(arrivals, key=itemgetter(0)):
+            if is_driver:
+                self.cost_matrix.add_drivers([(driver, drivers.node[driver]) for _, driver in run],
+                                             self.time)
+            else:
+                self.cost_matrix.add_passengers(
+                    [(passenger, passengers.pickup[passenger]) for _, passenger in run], self.time
+                )
+        self.arrivals = []
+
+    # Send a ready driver to a waiting passenger leaving now, scheduling the pickup
+    # The pickup is routed here unless the pairing cost already was its travel time
+    def dispatch(self, events, driver, passenger, cost):
+        drivers, passengers = self.drivers, self.passengers
+        time_to_passenger = cost if self.cost_matrix.etas else \
+            self.route(drivers.node[driver], passengers.pickup[passenger])
+        drivers.passenger[driver] = passenger
+        drivers.wait_start[driver] = max(passengers.arrival_time[passenger],
+                                         drivers.avail_time[driver])
+        drivers.dispatch_time[driver] = self.time
+        drivers.pickup_time[driver] = self.time + time_to_passenger
+        if self.event_log:
+            self.event_log.record(MATCH, self.time, drivers.num[driver], passengers.num[passenger],
+                                  time_to_passenger * 60)
+        events.push(drivers.pickup_time[driver], PICKUP, driver)
+        
+        # Update driver position
+        drivers.node[driver] = passengers.dropoff[passenger]
+        drivers.set_status(driver, BUSY)
+        passengers.set_status(passenger, BUSY)
+
+    # Time the hot paths of a run: snapping, routing, ETA searches, matching and events
+    def instrument(self, events):
+        profiler = self.profiler
+        profiler.wrap(self.node_index, 'nearest_many', 'snap')
+        profiler.wrap(self, 'route', 'route')
+        profiler.wrap(self, 'dispatch_batch', 'batch_assignment')
+        profiler.wrap(self.cost_matrix, 'travel_times', 'eta_searches')
+        profiler.wrap(self.cost_matrix, 'pop_min', 'pop_min')
+        profiler.wrap(events, 'push', 'event_push')
+        profiler.wrap(events, 'pop', 'event_pop')
+
+    # Counters of the run so far, for profiler summaries and snapshots
+    def gauges(self, events):
+        cache = self.path_cache
+        return {
+            'sim_time': self.time,
+            'searches': cache.searches + self.cost_matrix.searches,
+            'pairs_timed': self.cost_matrix.pairs_timed,
+            'nodes_settled': self.graph.total_settled() +
+                             (self.hierarchy.settled if self.hierarchy else 0),
+            'heap_pushes': self.graph.total_pushes() +
+                           (self.hierarchy.pushes if self.hierarchy else 0),
+            'cache_hits': cache.hits,
+            'cache_misses': cache.misses,
+            'cache_evictions': cache.evictions,
+            'eta_cache_hits': self.eta_cache.hits,
+            'eta_cache_misses': self.eta_cache.misses,
+            'eta_cache_evictions': self.eta_cache.evictions,
+            'ready_drivers': self.drivers.counts[READY],
+            'ready_passengers': self.passengers.counts[READY],
+            'busy_drivers': self.drivers.counts[BUSY],
+            'cost_matrix_heap': len(self.cost_matrix.heap),
+            'event_queue': len(events),
+            'rides': self.total_rides,
+        }
+
+    # Dispatch every waiting passenger that can be served with the driver assignment
+    # of least total cost (pickup time for 'eta') over the current cost matrix
+    # Pairs without a route are not dispatched; they wait for the next arrival
+    def dispatch_batch(self, events):
+        drivers, passengers, times = self.cost_matrix.matrix()
+        if self.profiler:
+            self.profiler.observe('round_drivers', len(drivers))
+            self.profiler.observe('round_passengers', len(passengers))
+        matched = []
+        for row, column in assignment(times):
+            driver, passenger = drivers[row], passengers[column]
+            if self.cost_matrix.etas and times[row][column] >= UNREACHABLE:
+                continue
+            self.cost_matrix.remove_driver(driver)
+            self.cost_matrix.remove_passenger(passenger)
+            self.dispatch(events, driver, passenger, times[row][column])
+            matched.append((driver, passenger))
+        return matched
+
+    # Averages printed at the end of a run: passenger wait (D1) and ride profit (D2), in minutes
+    def metrics(self):
+        avg_wait = self.wait_time / self.total_passengers if self.total_passengers > 0 else 0
+        avg_profit = (self.driving_passengers - self.driving_for_pickup) / self.total_rides if self.total_rides > 0 else 0
+        return avg_wait, avg_profit
+
+    # Determine if the driver continues driving based on how long they have been driving
+    def continue_driving(self, duration):
+        probability = exp(-self.decay * duration)
+        return round(probability * 100, 2), self.rng.random() < probability
+
+    # Run the simulation over the trip files, logging each match, pickup and dropoff,
+    # and return the metrics; matches are only kept by the event log, so memory does not
+    # grow with the length of the trip files
+    def run(self):
+        self.drivers = drivers = Drivers()
+        self.passengers = passengers = Passengers()
+        self.arrivals = []
+        pool = EtaPool(self.workers) if self.workers > 1 else None
+        self.cost_matrix = COST_MATRICES[self.cost](self.graph, self.eta_cache, self.candidates,
+                                                    self.radius_km, pool)
+        node_id = self.graph.node_id
+        
+        driver_counter = passenger_counter = 0
+        total_done_counter = total_picked_up = 0
+        
+        # Reset metrics
+        self.wait_time = self.driving_for_pickup = 0
+        self.driving_passengers = self.total_rides = 0
+        
+        self.preprocess_nodes()
+        events = EventQueue()
+        log = self.event_log
+        if self.profiler:
+            self.instrument(events)
+        passenger_rows, driver_rows = self.trip_streams()
+        
+        # Only the next row of each file sits in the queue, the following one is
+        # queued when it is handled
+        batch_pending = False
+        passengers_left = self.queue_next(events, passenger_rows, PASSENGER_ARRIVAL)
+        self.queue_next(events, driver_rows, DRIVER_LOGIN)
+        
+        # Main simulation loop: jump to the next event time, handle every event due
+        # then, and match whoever is waiting. Runs until all passengers are dropped off
+        while events and (passengers_left or passengers.counts[READY] or drivers.counts[BUSY]):
+            self.time = events.next_time()
+            if self.profiler and self.profiler.due():
+                self.profiler.snapshot(self.gauges(events))
+            
+            # Pickup ETAs use the edge times of the current hour
+            self.cost_matrix.graph = self.graph.at_slot(week_slot(self.week_hour(self.time)))
+            
+            while events and events.next_time() <= self.time:
+                _, kind, payload = events.pop()
+                
+                if kind == PASSENGER_ARRIVAL:
+                    row = payload
+                    passengers_left = self.queue_next(events, passenger_rows, PASSENGER_ARRIVAL)
+                    passenger_counter += 1
+                    passenger = passengers.add(passenger_counter, row[0], node_id(row[5][2]),
+                                               node_id(row[6][2]))
+                    self.arrivals.append((False, passenger))
+                
+                elif kind == DRIVER_LOGIN:
+                    row = payload
+                    self.queue_next(events, driver_rows, DRIVER_LOGIN)
+                    driver_counter += 1
+                    driver = drivers.add(driver_counter, node_id(row[3][2]), row[0])
+                    self.arrivals.append((True, driver))
+                
+                elif kind == PICKUP:
+                    driver = payload
+                    passenger = drivers.passenger[driver]
+                    total_picked_up += 1
+                    
+                    # Calculate trip time with the router, departing now
+                    travel_time = self.route(passengers.pickup[passenger],
+                                             passengers.dropoff[passenger], self.time)
+                    if log:
+                        log.record(LOG_PICKUP, self.time, drivers.num[driver],
+                                   passengers.num[passenger], travel_time * 60)
+                    drivers.dropoff_time[driver] = self.time + travel_time
+                    events.push(drivers.dropoff_time[driver], DROPOFF, driver)
+                
+                elif kind == BATCH:
+                    batch_pending = False
+                    self.add_arrivals(grouped=True)
+                    self.dispatch_batch(events)
+                
+                else:  # DROPOFF
+                    driver = payload
+                    passenger = drivers.passenger[driver]
+                    total_done_counter += 1
+                    wait_start = drivers.wait_start[driver]
+                    pickup_time = drivers.pickup_time[driver]
+                    dropoff_time = drivers.dropoff_time[driver]
+                    
+                    # Update metrics
+                    self.wait_time += (dropoff_time - wait_start) * 60
+                    
+                    # Only the drive to the pickup, not time idle before a batch dispatch
+                    self.driving_for_pickup += (pickup_time - drivers.dispatch_time[driver])
+                    self.driving_passengers += (dropoff_time - pickup_time)
+                    self.total_rides += 1
+                    
+                    if log:
+                        log.record(LOG_DROPOFF, self.time, drivers.num[driver],
+                                   passengers.num[passenger], (pickup_time - wait_start) * 60,
+                                   (dropoff_time - pickup_time) * 60)
+                    passengers.release(passenger)
+                    
+                    # Determine if driver continues
+                    drivers.time_driving[driver] += (dropoff_time - drivers.start_time[driver])
+                    percent, cont = self.continue_driving(drivers.time_driving[driver])
+                    
+                    if cont:
+                        if log:
+                            log.record(DRIVER_RETURN, self.time, drivers.num[driver], 0, percent)
+                        drivers.avail_time[driver] = dropoff_time
+                        drivers.set_status(driver, READY)
+                        self.arrivals.append((True, driver))
+                    else:
+                        if log:
+                            log.record(DRIVER_EXIT, self.time, drivers.num[driver], 0,
+                                       100 - percent)
+                        drivers.release(driver)
+                
+            # Batch mode dispatches one window after the first arrival not yet matched; a
+            # round is only scheduled once someone new is waiting, as pairs left over have
+            # no route
+            if self.matcher == 'batch':
+                if (self.arrivals and drivers.counts[READY] and passengers.counts[READY] and
+                        not batch_pending):
+                    events.push(self.time + self.window, BATCH, None)
+                    batch_pending = True
+                continue
+            
+            # Match drivers and passengers using min travel time
+            # The cost matrix is kept up to date as drivers and passengers come and go
+            self.add_arrivals()
+            if self.profiler and drivers.counts[READY] and passengers.counts[READY]:
+                self.profiler.observe('round_drivers', drivers.counts[READY])
+                self.profiler.observe('round_passengers', passengers.counts[READY])
+            while drivers.counts[READY] and passengers.counts[READY]:
+                driver, passenger, time_to_passenger = self.cost_matrix.pop_min()
+                self.dispatch(events, driver, passenger, time_to_passenger)
+                        
+        if pool is not None:
+            pool.close()
+        if log:
+            log.close()
+        
+        # Print final metrics
+        self.total_passengers = passenger_counter
+        if self.profiler:
+            self.profiler.finish(self.gauges(events))
+        avg_wait, avg_profit = self.metrics()
+        
+        print(f"Average wait time was {avg_wait:.2f} minutes")
+        print(f"Average ride profit was {avg_profit:.2f} minutes")
+        
+        for name, cache in (('Path', self.path_cache), ('ETA', self.eta_cache)):
+            print(f"{name} cache: {cache.hits} hits, {cache.misses} misses, "
+                  f"{cache.evictions} evictions ({cache.hit_rate() * 100:.1f}% hit rate)")
+        
+        return avg_wait, avg_profit
+
+
+# argparse type for counts that must be at least 1
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+# argparse type for counts that may be 0
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return value
+
+
+# argparse type for durations that must be above 0
+def positive_float(text):
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be above 0, got {value:g}")
+    return value
+
+
+# Add the options of an Algorithm to an argparse parser; replicated leaves out the
+# seed, decay and ETA workers, which sweep.py sets per replication itself
+def add_simulation_arguments(parser, replicated=False):
+    parser.add_argument('--policy', choices=POLICIES, default='haversine_a_star')
+    parser.add_argument('--router', choices=ROUTERS, help="default: the policy's router")
+    parser.add_argument('--snap', choices=('kdtree', 'window'), help="default: the policy's")
+    parser.add_argument('--largest-component', action='store_true',
+                        help="snap only to nodes of the largest strongly connected component")
+    parser.add_argument('--queue', choices=('heap', 'radix'), default='heap',
+                        help="priority queue of the dijkstra router (radix: --router dijkstra only)")
+    parser.add_argument('--matcher', choices=('greedy', 'batch'), default='greedy')
+    parser.add_argument('--window', type=positive_float, default=30, help="batch window in seconds")
+    parser.add_argument('--limit', type=non_negative_int, help="passengers to read (default: all)")
+    parser.add_argument('--candidates', type=positive_int,
+                        help="nearest idle drivers timed per passenger")
+    parser.add_argument('--radius', type=float, dest='radius_km', help="candidate radius in km")
+    if not replicated:
+        parser.add_argument('--workers', type=int, default=1,
+                            help="processes for the ETA searches of batch rounds (greedy "
+                                 "rounds are one search each and run serially)")
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--decay', type=float, default=0.5,
+                            help="continue_driving decay per hour")
+    parser.add_argument('--passengers', dest='passenger_file', default='passengers.csv')
+    parser.add_argument('--drivers', dest='driver_file', default='drivers.csv')
+
+
+# Reject combinations of parsed simulation options that argparse cannot check alone
+def check_simulation_options(parser, options):
+    router = options['router'] or POLICIES[options['policy']][1]
+    if options['queue'] == 'radix' and router != 'dijkstra':
+        parser.error(f"--queue radix needs the dijkstra router, not {router}")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Simulate the Nuber rideshare service")
+    add_simulation_arguments(parser)
+    parser.add_argument('--profile', metavar='FILE', help="write a JSON profile of the run")
+    parser.add_argument('--snapshots', metavar='FILE', help="append JSON profile lines while running")
+    parser.add_argument('--snapshot-interval', type=float, default=10, help="seconds")
+    parser.add_argument('--log', metavar='FILE', help="event log, CSV if FILE ends in .csv")
+    parser.add_argument('--verbosity', choices=('off', *VERBOSITY), default='console',
+                        help="console prints every event, events only logs them to --log")
+    options = vars(parser.parse_args(arguments))
+    check_simulation_options(parser, options)
+    profile, snapshots = options.pop('profile'), options.pop('snapshots')
+    interval = options.pop('snapshot_interval')
+    if profile or snapshots:
+        options['profiler'] = Profiler(profile, snapshots, interval)
+    path, verbosity = options.pop('log'), options.pop('verbosity')
+    if verbosity == 'console' or (verbosity == 'events' and path):
+        options['event_log'] = EventLog(path, verbosity)
+    algo = Algorithm(**options)
+    return algo.run()
+
+
+# Run the simulation
+if __name__ == "__main__":
+    main()
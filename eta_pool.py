@@ -0,0 +1,84 @@
+# Process pool for the one-to-many searches that fill the driver x passenger matrix
+# Each worker memory-maps graph.snapshot itself, so the CSR arrays of the graph and its
+# reverse are shared through the page cache instead of being pickled or rebuilt; only
+# node ids and travel times cross process boundaries
+#
+# Usage: python eta_pool.py [searches] [targets]   serial vs pool timing of one round
+import multiprocessing
+import os
+import sys
+import time
+from random import Random
+
+from snapshot import open_graph, open_snapshot
+
+# The graph in a worker process, mapped by start_worker
+worker_graph = None
+
+
+def start_worker(snapshot_path):
+    global worker_graph
+    worker_graph = open_snapshot(snapshot_path)
+
+
+# One search in a worker: (slot, reverse, source, targets) -> {target: time}
+def search(task):
+    slot, reverse, source, targets = task
+    graph = worker_graph if slot is None else worker_graph.at_slot(slot)
+    if reverse:
+        graph = graph.reverse()
+    return graph.dijkstra_many(source, targets)
+
+
+# Workers start on the first call, so runs that never have more than one search at a
+# time (greedy matching) do not spawn them
+class EtaPool:
+    def __init__(self, processes=None, snapshot_path='graph.snapshot'):
+        self.processes = processes or os.cpu_count()
+        self.snapshot_path = snapshot_path
+        self.pool = None
+
+    # Run one-to-many searches [(source, targets)] on the weights of graph's hourly
+    # slot, on the reversed graph if reverse is set; results come back in order
+    def dijkstra_many(self, graph, searches, reverse=False):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes, start_worker, (self.snapshot_path,))
+        tasks = [(graph.slot, reverse, source, targets) for source, targets in searches]
+        chunksize = max(1, len(tasks) // (4 * self.processes))
+        return self.pool.map(search, tasks, chunksize)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+# Time one matching round of one-to-many searches serially and on pools of
+# increasing size, checking the pools return the same times
+def main(searches=64, targets=32):
+    graph = open_graph()
+    rng = Random(0)
+    round_ = [(rng.randrange(len(graph)), [rng.randrange(len(graph)) for _ in range(targets)])
+              for _ in range(searches)]
+
+    start = time.perf_counter()
+    expected = [graph.dijkstra_many(source, others) for source, others in round_]
+    serial = time.perf_counter() - start
+    print(f"{searches} searches x {targets} targets, {len(graph)} nodes")
+    print(f"serial:      {serial:6.2f} s")
+
+    processes = 1
+    while processes <= os.cpu_count():
+        pool = EtaPool(processes)
+        pool.dijkstra_many(graph, round_[:processes])  # Map the snapshot in every worker
+        start = time.perf_counter()
+        found = pool.dijkstra_many(graph, round_)
+        elapsed = time.perf_counter() - start
+        pool.close()
+        print(f"{processes:3d} workers: {elapsed:6.2f} s, {serial / elapsed:5.2f}x"
+              f"{'' if found == expected else ', MISMATCH'}")
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
@@ -0,0 +1,133 @@
+# Structured event log of a simulation run
+# Events are appended to typed columns (array.array) instead of being printed one by
+# one, and flushed in bulk whenever the buffer fills and at the end of the run: to a
+# CSV file (path ending in .csv) or a compact binary file of columnar chunks in the
+# machine's byte order, and at the 'console' verbosity also to stdout in the
+# simulator's usual messages
+#
+# Usage: python event_log.py run.log   prints a binary log as CSV
+import csv
+import struct
+import sys
+from array import array
+
+MATCH, PICKUP, DROPOFF, DRIVER_RETURN, DRIVER_EXIT = range(5)
+EVENTS = ('match', 'pickup', 'dropoff', 'driver_return', 'driver_exit')
+
+# Verbosity levels: 'events' writes the log file only, 'console' also prints every event
+VERBOSITY = ('events', 'console')
+
+MAGIC = b'NUBERLG\0'
+
+# Columns in file order: (name, typecode)
+# value and extra depend on the event: match has the pickup ETA (minutes), pickup the trip
+# time (minutes), dropoff the passenger's wait and the trip duration (minutes), and
+# driver_return/driver_exit the probability (%) of the decision
+COLUMNS = (
+    ('event', 'B'),
+    ('time', 'd'),
+    ('driver', 'q'),
+    ('passenger', 'q'),
+    ('value', 'd'),
+    ('extra', 'd'),
+)
+
+# Rows in one binary chunk follow its row count
+CHUNK = struct.Struct('<I')
+
+
+class EventLog:
+    # path None keeps nothing beyond the console output; capacity is rows per flush
+    def __init__(self, path=None, verbosity='events', capacity=1 << 16):
+        self.path = path
+        self.console = verbosity == 'console'
+        self.capacity = capacity
+        self.binary = path is not None and not path.endswith('.csv')
+        self.dropoffs = 0                  # Dropoffs printed so far, for the console messages
+        self.rows = 0
+        self.columns = [array(typecode) for _, typecode in COLUMNS]
+        (self.events, self.times, self.drivers, self.passengers,
+         self.values, self.extras) = self.columns
+        if self.binary:
+            with open(path, 'wb') as file:
+                file.write(MAGIC)
+        elif path is not None:
+            with open(path, 'w', newline='') as file:
+                csv.writer(file).writerow([name for name, _ in COLUMNS])
+
+    def record(self, event, time, driver, passenger, value=0.0, extra=0.0):
+        self.events.append(event)
+        self.times.append(time)
+        self.drivers.append(driver)
+        self.passengers.append(passenger)
+        self.values.append(value)
+        self.extras.append(extra)
+        self.rows += 1
+        if self.rows >= self.capacity:
+            self.flush()
+
+    # Console messages of the buffered events; matches were never printed
+    def messages(self):
+        for event, time, driver, passenger, value, extra in zip(*self.columns):
+            if event == PICKUP:
+                yield f"Passenger #{passenger} Picked Up at {time} by Driver #{driver}"
+            elif event == DROPOFF:
+                self.dropoffs += 1
+                yield (f"Passenger #{passenger} Dropped Off By Driver #{driver} "
+                       f"Passenger waited for {value:.2f} minutes. "
+                       f"Trip took {extra:.2f} minutes. "
+                       f"{self.dropoffs} passengers have been dropped off")
+            elif event == DRIVER_RETURN:
+                yield f"With probability {value}%, Driver #{driver} back on duty"
+            elif event == DRIVER_EXIT:
+                yield f"With probability {value}%, Driver #{driver} off duty"
+
+    # Write the buffered events out and empty the buffer
+    def flush(self):
+        if not self.rows:
+            return
+        if self.console:
+            lines = '\n'.join(self.messages())
+            if lines:
+                sys.stdout.write(lines + '\n')
+        if self.binary:
+            with open(self.path, 'ab') as file:
+                file.write(CHUNK.pack(self.rows))
+                for column in self.columns:
+                    column.tofile(file)
+        elif self.path is not None:
+            with open(self.path, 'a', newline='') as file:
+                csv.writer(file).writerows(
+                    (EVENTS[event], *row) for event, *row in zip(*self.columns)
+                )
+        for column in self.columns:
+            del column[:]
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+
+
+# Rows of a binary log as (event name, time, driver, passenger, value, extra)
+def read_log(path):
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an event log")
+        while True:
+            header = file.read(CHUNK.size)
+            if not header:
+                return
+            rows, = CHUNK.unpack(header)
+            columns = []
+            for _, typecode in COLUMNS:
+                column = array(typecode)
+                column.fromfile(file, rows)
+                columns.append(column)
+            for event, *row in zip(*columns):
+                yield (EVENTS[event], *row)
+
+
+if __name__ == "__main__":
+    writer = csv.writer(sys.stdout)
+    writer.writerow([name for name, _ in COLUMNS])
+    writer.writerows(read_log(sys.argv[1]))
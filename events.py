@@ -0,0 +1,32 @@
+# Discrete-event queue for the simulation clock
+# Events are (time, kind, payload) and come off a heap in time order, so the
+# simulator jumps straight to the next thing that happens instead of polling
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+# Event kinds, also the order events sharing a timestamp are handled in: a driver
+# who drops off at time t is free for the passengers arriving at t, and a batch
+# dispatch at t sees everyone who turned up by then
+DROPOFF, PICKUP, PASSENGER_ARRIVAL, DRIVER_LOGIN, BATCH = range(5)
+
+
+class EventQueue:
+    def __init__(self, events=()):
+        self.sequence = count()           # Keeps same-time, same-kind events in push order
+        self.heap = [(time, kind, next(self.sequence), payload) for time, kind, payload in events]
+        heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, time, kind, payload):
+        heappush(self.heap, (time, kind, next(self.sequence), payload))
+
+    # Remove and return the earliest (time, kind, payload)
+    def pop(self):
+        time, kind, _, payload = heappop(self.heap)
+        return time, kind, payload
+
+    # Time of the earliest event, None if the queue is empty
+    def next_time(self):
+        return self.heap[0][0] if self.heap else None
@@ -0,0 +1,102 @@
+# Driver and passenger state as struct-of-arrays
+# Every driver and passenger is an integer id into preallocated typed columns
+# (array.array, and a bytearray of statuses) instead of an object with its own __dict__,
+# so one costs tens of bytes. Ids of drivers gone off duty and passengers dropped off go
+# on a free list and are handed out again; columns double when they run out of room
+# Statuses are counted as they change
+from array import array
+
+# FREE: unused id; READY: idle driver or waiting passenger; BUSY: on a trip
+FREE, READY, BUSY = range(3)
+
+
+class Table:
+    COLUMNS = ()                          # (name, typecode) of the columns besides status
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.size = 0                     # Ids handed out so far, free or not
+        self.free = []                    # Released ids, reused last in first out
+        self.counts = [0, 0, 0]           # Ids per status (FREE counts released ids)
+        self.status = bytearray(capacity)
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode, [0]) * capacity)
+
+    # Live (not free) ids
+    def __len__(self):
+        return self.size - len(self.free)
+
+    def grow(self):
+        extra = self.capacity
+        self.status.extend(bytes(extra))
+        for name, typecode in self.COLUMNS:
+            getattr(self, name).extend(array(typecode, [0]) * extra)
+        self.capacity += extra
+
+    # A free id with the given status; its other columns hold stale values
+    def allocate(self, status):
+        if self.free:
+            entity = self.free.pop()
+            self.set_status(entity, status)
+            return entity
+        if self.size == self.capacity:
+            self.grow()
+        entity = self.size
+        self.size += 1
+        self.status[entity] = status
+        self.counts[status] += 1
+        return entity
+
+    def set_status(self, entity, status):
+        self.counts[self.status[entity]] -= 1
+        self.status[entity] = status
+        self.counts[status] += 1
+
+    def release(self, entity):
+        self.set_status(entity, FREE)
+        self.free.append(entity)
+
+
+class Drivers(Table):
+    # num is the driver's number in the trip file; node the road node id the driver is
+    # at (the dropoff while on a trip); pickup_time and dropoff_time are of the current trip
+    COLUMNS = (
+        ('num', 'q'),
+        ('node', 'i'),
+        ('start_time', 'd'),
+        ('avail_time', 'd'),
+        ('wait_start', 'd'),
+        ('dispatch_time', 'd'),           # When the driver was sent to the passenger
+        ('pickup_time', 'd'),
+        ('dropoff_time', 'd'),
+        ('time_driving', 'd'),
+        ('passenger', 'q'),               # Passenger id of the current trip
+    )
+
+    # A ready driver who logged in at time
+    def add(self, num, node, time):
+        driver = self.allocate(READY)
+        self.num[driver] = num
+        self.node[driver] = node
+        self.start_time[driver] = self.avail_time[driver] = time
+        self.time_driving[driver] = 0
+        self.passenger[driver] = -1
+        return driver
+
+
+class Passengers(Table):
+    COLUMNS = (
+        ('num', 'q'),
+        ('arrival_time', 'd'),
+        ('pickup', 'i'),                  # Road node ids of the pickup and dropoff
+        ('dropoff', 'i'),
+    )
+
+    # A passenger waiting since time
+    def add(self, num, time, pickup, dropoff):
+        passenger = self.allocate(READY)
+        self.num[passenger] = num
+        self.arrival_time[passenger] = time
+        self.pickup[passenger] = pickup
+        self.dropoff[passenger] = dropoff
+        return passenger
@@ -0,0 +1,19 @@
+# Distance functions shared by the graph, routing and spatial modules
+from math import radians, cos, sin, asin, sqrt
+
+
+# Calculate distance between 2 points on earth using latitude and longitude
+def haversine_distance(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    return 6371 * (2 * asin(sqrt(a)))
+
+
+# Calculate the straight line distance (Euclidean) between two points
+# Assumes no curvature of the earth for simplicity
+def euclidean_distance(lon1, lat1, lon2, lat2):
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    return sqrt(dlon*dlon + dlat*dlat)
@@ -0,0 +1,680 @@
+# Compact road network: nodes are renumbered to integers and the adjacency
+# list is stored as CSR arrays (offsets, neighbor ids, edge times) instead
+# of the nested dicts from adjacency.json
+import json
+import zlib
+from array import array
+from heapq import heappop, heappush
+from math import inf, nan
+
+from geo import haversine_distance
+
+# Travel time reported when no path exists, same sentinel the T1-T5 searches used
+UNREACHABLE = 10000
+
+# Bits of Graph.reach: the node can be reached from the largest strongly connected
+# component, and can reach it; nodes of the largest component have both
+FROM_LARGEST, TO_LARGEST = 1, 2
+IN_LARGEST = FROM_LARGEST | TO_LARGEST
+
+# Swaps the two reach bits, for the reversed graph
+REVERSED_REACH = bytes((value & ~IN_LARGEST) | (value & FROM_LARGEST) << 1 | (value & TO_LARGEST) >> 1
+                       for value in range(256))
+
+# Edge times are quantized to integer deciseconds for the radix heap searches
+DECISECONDS_PER_HOUR = 36000
+
+# Bits per node id in a radix heap entry, (time << NODE_BITS) | node
+NODE_BITS = 32
+
+# Node orders for build_graph: 'hilbert' along a Hilbert curve over the coordinates,
+# 'bfs' in breadth-first order over the road links, 'input' as in the json files
+ORDERS = ('hilbert', 'bfs', 'input')
+
+# Cells per side of the Hilbert curve grid, 2^16
+HILBERT_SIDE = 1 << 16
+
+# Hourly travel time slots per edge: 24 weekday hours followed by 24 weekend hours
+SLOTS = 48
+WEEK_HOURS = 168
+
+
+class Graph:
+    def __init__(self, keys, lon, lat, offsets, targets, weights, hourly, index=None,
+                 component=None, reach=None):
+        self.keys = keys                      # int id -> node key from the json files
+        self.index = index if index is not None else {key: node for node, key in enumerate(keys)}
+        self.lon = lon                        # longitudes by node id, nan if not in node_data
+        self.lat = lat                        # latitudes by node id, nan if not in node_data
+        self.offsets = offsets                # edges of node u are offsets[u]:offsets[u + 1]
+        self.targets = targets                # neighbor ids
+        self.weights = weights                # edge travel times (hours)
+        self.hourly = hourly                  # SLOTS blocks of per-edge travel times, slot-major
+        self.component = component            # Strongly connected component by node id
+        self.reach = reach                    # FROM_LARGEST/TO_LARGEST bits by node id
+        self.reverse_graph = None
+        self.integer_weights = None           # weights in deciseconds, built on first use
+        self.top_speed = None                 # Fastest straight-line speed, found on first use
+        self.settled = 0                      # Nodes settled by all searches so far
+        self.pushes = 0                       # Priority queue pushes by all searches so far
+
+        # Per-slot weight views into hourly, so changing hour is a pointer swap
+        edges, view = len(targets), memoryview(hourly)
+        self.slot_weights = [view[slot * edges:(slot + 1) * edges] for slot in range(SLOTS)]
+        self.slot_graphs = {}
+        self.base, self.slot = None, None
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Int id for a node key, or -1 if the key is not part of the network
+    def node_id(self, key):
+        return self.index.get(key, -1)
+
+    # (lon, lat, key) for every node with coordinates, in id order; with largest set,
+    # only those of the largest strongly connected component, between which every
+    # route exists
+    def nodes(self, largest=False):
+        lon, lat, reach = self.lon, self.lat, self.reach
+        for node, key in enumerate(self.keys):
+            if lon[node] == lon[node] and (not largest or reach[node] == IN_LARGEST):  # Skip nan
+                yield lon[node], lat[node], key
+
+    # True if no path from source to target can exist, answered from the component
+    # arrays without searching; False means a search is needed (or the graph has none)
+    # Components are numbered so that edges never lead to a lower one, and a node
+    # that can reach the largest component reaches everything reachable from it
+    def unreachable(self, source, target):
+        component = self.component
+        if component is None or component[source] == component[target]:
+            return False
+        if component[source] > component[target]:
+            return True
+        reach = self.reach
+        if reach[source] & TO_LARGEST and reach[target] & FROM_LARGEST:
+            return False
+        return reach[source] == IN_LARGEST or reach[target] == IN_LARGEST
+
+    # The same graph with the edge weights of one hourly slot, sharing all arrays
+    def at_slot(self, slot):
+        base = self.base or self
+        if slot not in base.slot_graphs:
+            view = Graph(base.keys, base.lon, base.lat, base.offsets, base.targets,
+                         base.slot_weights[slot], base.hourly, base.index, base.component,
+                         base.reach)
+            view.base, view.slot = base, slot
+            base.slot_graphs[slot] = view
+        return base.slot_graphs[slot]
+
+    # Clock (week hours) at the end of an edge entered at clock
+    # Travels at the speed of each hour until that hour ends, so that entering an
+    # edge later never means leaving it earlier (FIFO)
+    def arrival(self, edge, clock):
+        remaining = 1.0
+        while True:
+            duration = self.slot_weights[week_slot(clock)][edge]
+            boundary = int(clock) + 1
+            if duration <= 0 or clock + remaining * duration <= boundary:
+                return clock + remaining * duration
+            remaining -= (boundary - clock) / duration
+            clock = boundary
+
+    # Graph with every edge reversed, built on first use
+    def reverse(self):
+        if self.base is not None:
+            return self.base.reverse().at_slot(self.slot)
+        if self.reverse_graph is not None:
+            return self.reverse_graph
+        nodes, edges = len(self.keys), len(self.targets)
+
+        # Counting sort of the edges by their head node
+        offsets = array('i', [0]) * (nodes + 1)
+        for target in self.targets:
+            offsets[target + 1] += 1
+        for node in range(nodes):
+            offsets[node + 1] += offsets[node]
+
+        position = array('i', offsets[:nodes])
+        targets = array('i', [0]) * edges
+        weights = array('d', [0]) * edges
+        moved = array('i', [0]) * edges       # Reversed position of each original edge
+        for node in range(nodes):
+            for edge in range(self.offsets[node], self.offsets[node + 1]):
+                head = self.targets[edge]
+                place = position[head]
+                position[head] += 1
+                targets[place], weights[place], moved[edge] = node, self.weights[edge], place
+
+        hourly = array('f', [0]) * len(self.hourly)
+        for block in range(0, len(self.hourly), max(edges, 1)):
+            for edge in range(edges):
+                hourly[block + moved[edge]] = self.hourly[block + edge]
+
+        # Same components in the opposite order, and reaching the largest one swaps
+        # with being reached from it
+        component = reach = None
+        if self.component is not None:
+            component = array('i', [-number for number in self.component])
+            reach = array('B', bytes(self.reach).translate(REVERSED_REACH))
+        self.reverse_graph = Graph(self.keys, self.lon, self.lat, offsets, targets, weights,
+                                   hourly, self.index, component, reach)
+        self.reverse_graph.reverse_graph = self
+        return self.reverse_graph
+
+    # This graph, its hourly views and its reverse, whose search counters add up
+    def search_graphs(self):
+        base = self.base or self
+        graphs = [base, *base.slot_graphs.values()]
+        if base.reverse_graph is not None:
+            graphs += [base.reverse_graph, *base.reverse_graph.slot_graphs.values()]
+        return graphs
+
+    # Nodes settled by searches on this graph, its hourly views and its reverse
+    def total_settled(self):
+        return sum(graph.settled for graph in self.search_graphs())
+
+    # Priority queue pushes by searches on this graph, its hourly views and its reverse
+    def total_pushes(self):
+        return sum(graph.pushes for graph in self.search_graphs())
+
+    # Dijkstra's algorithm between two node ids
+    # With a departure clock (week hours) edge times follow the hourly speed tables
+    def dijkstra(self, source, target, departure=None):
+        if source < 0 or target < 0 or self.unreachable(source, target):
+            return UNREACHABLE
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        time = {source: 0}
+        priority_queue = [(0, source)]
+        settled, pushes = 0, 1
+        spare = inf  # Time left in the current hour, edges longer than this cross into the next
+
+        while priority_queue:
+            current_time, node = heappop(priority_queue)
+            if node == target:
+                self.settled += settled + 1
+                self.pushes += pushes
+                return current_time
+            if current_time > time[node]:
+                continue  # Stale queue entry
+            settled += 1
+            if departure is not None:
+                clock = departure + current_time
+                weights, spare = self.slot_weights[week_slot(clock)], int(clock) + 1 - clock
+
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                duration = weights[edge]
+                if duration > spare:
+                    duration = self.arrival(edge, clock) - clock
+                new_time = current_time + duration
+                if new_time < time.get(neighbor, UNREACHABLE):
+                    time[neighbor] = new_time
+                    heappush(priority_queue, (new_time, neighbor))
+                    pushes += 1
+
+        self.settled += settled
+        self.pushes += pushes
+        return UNREACHABLE
+
+    # Dijkstra from one source until every target is settled, as {target: time}
+    def dijkstra_many(self, source, targets, departure=None):
+        result = {target: UNREACHABLE for target in targets}
+        remaining = set(result)
+        remaining.discard(-1)
+        if source < 0:
+            return result
+        if self.component is not None:
+            remaining = {target for target in remaining if not self.unreachable(source, target)}
+        offsets, edge_targets, weights = self.offsets, self.targets, self.weights
+        time = {source: 0}
+        priority_queue = [(0, source)]
+        settled, pushes = 0, 1
+        spare = inf
+
+        while priority_queue and remaining:
+            current_time, node = heappop(priority_queue)
+            if current_time > time[node]:
+                continue  # Stale queue entry
+            settled += 1
+            if node in remaining:
+                result[node] = current_time
+                remaining.discard(node)
+            if departure is not None:
+                clock = departure + current_time
+                weights, spare = self.slot_weights[week_slot(clock)], int(clock) + 1 - clock
+
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = edge_targets[edge]
+                duration = weights[edge]
+                if duration > spare:
+                    duration = self.arrival(edge, clock) - clock
+                new_time = current_time + duration
+                if new_time < time.get(neighbor, UNREACHABLE):
+                    time[neighbor] = new_time
+                    heappush(priority_queue, (new_time, neighbor))
+                    pushes += 1
+
+        self.settled += settled
+        self.pushes += pushes
+        return result
+
+    # Edge times rounded to integer deciseconds
+    def quantized_weights(self):
+        if self.integer_weights is None:
+            self.integer_weights = array('i', [round(weight * DECISECONDS_PER_HOUR)
+                                               for weight in self.weights])
+        return self.integer_weights
+
+    # Dijkstra between two node ids on integer decisecond edge times, with a monotone
+    # radix heap instead of heapq: an entry waits in the bucket numbered by the highest
+    # bit in which its time differs from the last time popped, and only the first
+    # non-empty bucket is ever redistributed. Entries are single ints, time above the
+    # node id, so buckets are plain lists and their minimum is a builtin min
+    # Uses this graph's static weights (e.g. one hourly slot); the result is in hours
+    # and within half a decisecond per edge of dijkstra's
+    def dijkstra_radix(self, source, target):
+        if source < 0 or target < 0 or self.unreachable(source, target):
+            return UNREACHABLE
+        offsets, targets, weights = self.offsets, self.targets, self.quantized_weights()
+        time = {source: 0}
+        buckets = [[] for _ in range(64)]
+        buckets[0].append(source)
+        last, queued, settled, pushes = 0, 1, 0, 1
+        node_mask = (1 << NODE_BITS) - 1
+
+        while queued:
+            bucket = buckets[0]
+            if not bucket:
+                index = 1
+                while not buckets[index]:
+                    index += 1
+                bucket, buckets[index] = buckets[index], []
+                last = min(bucket) >> NODE_BITS
+                for entry in bucket:
+                    buckets[((entry >> NODE_BITS) ^ last).bit_length()].append(entry)
+                bucket = buckets[0]
+            node = bucket.pop() & node_mask
+            queued -= 1
+            current_time = last
+            if node == target:
+                self.settled += settled + 1
+                self.pushes += pushes
+                return current_time / DECISECONDS_PER_HOUR
+            if current_time > time[node]:
+                continue  # Stale queue entry
+            settled += 1
+
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                new_time = current_time + weights[edge]
+                if new_time < time.get(neighbor, new_time + 1):
+                    time[neighbor] = new_time
+                    buckets[(new_time ^ last).bit_length()].append(new_time << NODE_BITS | neighbor)
+                    queued += 1
+                    pushes += 1
+
+        self.settled += settled
+        self.pushes += pushes
+        return UNREACHABLE
+
+    # Travel times from source to every node (inf if unreachable) as an array by node id
+    def shortest_times(self, source):
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        time = array('d', [inf]) * len(self.keys)
+        time[source] = 0
+        priority_queue = [(0, source)]
+        pushes = 1
+
+        while priority_queue:
+            current_time, node = heappop(priority_queue)
+            if current_time > time[node]:
+                continue  # Stale queue entry
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                new_time = current_time + weights[edge]
+                if new_time < time[neighbor]:
+                    time[neighbor] = new_time
+                    heappush(priority_queue, (new_time, neighbor))
+                    pushes += 1
+
+        self.settled += len(self.keys)
+        self.pushes += pushes
+        return time
+
+    # A* between two node ids, using distance(node, target) / speed as the heuristic
+    # unless estimate(node) gives a lower bound on the remaining time directly
+    def a_star(self, source, target, distance=haversine_distance, speed=1, estimate=None,
+               departure=None):
+        if source < 0 or target < 0 or self.unreachable(source, target):
+            return UNREACHABLE
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        if estimate is None:
+            lon, lat = self.lon, self.lat
+            target_lon, target_lat = lon[target], lat[target]
+
+            def estimate(node):
+                return distance(lon[node], lat[node], target_lon, target_lat) / speed
+
+        time = {source: 0}
+        priority_queue = [(0, 0, source)]
+        settled, pushes = 0, 1
+        spare = inf
+
+        while priority_queue:
+            _, current_time, node = heappop(priority_queue)
+            if node == target:
+                self.settled += settled + 1
+                self.pushes += pushes
+                return current_time
+            if current_time > time[node]:
+                continue  # Stale queue entry
+            settled += 1
+            if departure is not None:
+                clock = departure + current_time
+                weights, spare = self.slot_weights[week_slot(clock)], int(clock) + 1 - clock
+
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                duration = weights[edge]
+                if duration > spare:
+                    duration = self.arrival(edge, clock) - clock
+                new_time = current_time + duration
+                if new_time < time.get(neighbor, UNREACHABLE):
+                    time[neighbor] = new_time
+                    heappush(priority_queue, (new_time + estimate(neighbor), new_time, neighbor))
+                    pushes += 1
+
+        self.settled += settled
+        self.pushes += pushes
+        return UNREACHABLE
+
+
+    # Highest haversine distance over travel time (km/h) of any edge with this graph's
+    # weights: distance / haversine_speed() never overestimates the time left, and by the
+    # triangle inequality it is a consistent heuristic
+    def haversine_speed(self):
+        if self.top_speed is None:
+            lon, lat, offsets, targets, weights = (self.lon, self.lat, self.offsets,
+                                                   self.targets, self.weights)
+            top = 0
+            for node in range(len(self.keys)):
+                for edge in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[edge]
+                    length = haversine_distance(lon[node], lat[node], lon[neighbor], lat[neighbor])
+                    if length > 0:
+                        top = max(top, length / weights[edge] if weights[edge] > 0 else inf)
+            self.top_speed = top or inf
+        return self.top_speed
+
+    # Bidirectional Dijkstra between two node ids: one search forward from source and
+    # one over the reversed graph from target, taking turns on the smaller queue key,
+    # until the two keys together reach the best meeting found so far
+    # With a distance function both searches are A* on the average of the forward and
+    # backward potentials (distance to target minus distance from source, halved),
+    # which keeps edge costs the same in both directions; the stopping test is only
+    # valid when distance / speed is consistent, e.g. haversine at haversine_speed()
+    # Uses this graph's static weights, e.g. one hourly slot from at_slot
+    def bidirectional(self, source, target, distance=None, speed=1):
+        if source < 0 or target < 0 or self.unreachable(source, target):
+            return UNREACHABLE
+        if source == target:
+            return 0
+        lon, lat = self.lon, self.lat
+        source_lon, source_lat = lon[source], lat[source]
+        target_lon, target_lat = lon[target], lat[target]
+
+        def potential(node):
+            if distance is None:
+                return 0
+            return (distance(lon[node], lat[node], target_lon, target_lat) -
+                    distance(lon[node], lat[node], source_lon, source_lat)) / (2 * speed)
+
+        reverse = self.reverse()
+        forward_time, backward_time = {source: 0}, {target: 0}
+        forward_queue = [(potential(source), 0, source)]
+        backward_queue = [(-potential(target), 0, target)]
+        searches = ((self, forward_time, forward_queue, backward_time, 1),
+                    (reverse, backward_time, backward_queue, forward_time, -1))
+        best = inf
+        settled, pushes = 0, 2
+
+        while forward_queue and backward_queue:
+            if forward_queue[0][0] + backward_queue[0][0] >= best:
+                break
+            graph, time, priority_queue, other_time, sign = \
+                searches[backward_queue[0][0] < forward_queue[0][0]]
+            _, current_time, node = heappop(priority_queue)
+            if current_time > time[node]:
+                continue  # Stale queue entry
+            settled += 1
+            offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                new_time = current_time + weights[edge]
+                if new_time < time.get(neighbor, inf):
+                    time[neighbor] = new_time
+                    heappush(priority_queue, (new_time + sign * potential(neighbor), new_time, neighbor))
+                    pushes += 1
+                    if neighbor in other_time and new_time + other_time[neighbor] < best:
+                        best = new_time + other_time[neighbor]
+
+        self.settled += settled
+        self.pushes += pushes
+        return best if best < UNREACHABLE else UNREACHABLE
+
+# crc32 of a graph's edge arrays, ties indexes saved next to it to the graph they came from
+def edge_checksum(graph):
+    crc = zlib.crc32(bytes(graph.offsets))
+    crc = zlib.crc32(bytes(graph.targets), crc)
+    return zlib.crc32(bytes(graph.weights), crc)
+
+
+# Build a Graph from the parsed adjacency.json and node_data.json dicts
+# Ids are handed out in the given order (see ORDERS), so that nodes close on the map
+# are close in the arrays; keys keeps the original key of every id
+def build_graph(adjacency, node_data, order='hilbert'):
+    keys = list(node_data)
+    seen = set(keys)
+
+    # Nodes that only appear in the adjacency list still need an id
+    for key, neighbors in adjacency.items():
+        for other in (key, *neighbors):
+            if other not in seen:
+                seen.add(other)
+                keys.append(other)
+
+    keys = node_order(keys, adjacency, node_data, order)
+    index = {key: node for node, key in enumerate(keys)}
+
+    lon = array('d', [nan]) * len(keys)
+    lat = array('d', [nan]) * len(keys)
+    for key, data in node_data.items():
+        lon[index[key]] = float(data['lon'])
+        lat[index[key]] = float(data['lat'])
+
+    offsets = array('i', [0])
+    targets = array('i')
+    weights = array('d')
+    slot_times = []
+    for key in keys:
+        for neighbor, connection_data in adjacency.get(key, {}).items():
+            targets.append(index[neighbor])
+            weights.append(connection_data[0]['time'])
+            slot_times.append(hourly_times(connection_data))
+        offsets.append(len(targets))
+
+    # Slot-major layout so one hour's weights are a contiguous block
+    hourly = array('f', [0]) * (SLOTS * len(targets))
+    for edge, times in enumerate(slot_times):
+        for slot, time in enumerate(times):
+            hourly[slot * len(targets) + edge] = time
+
+    component = strongly_connected_components(offsets, targets)
+    return Graph(keys, lon, lat, offsets, targets, weights, hourly, index, component,
+                 largest_component_reach(offsets, targets, component))
+
+
+# Keys in the order their nodes should be numbered
+def node_order(keys, adjacency, node_data, order='hilbert'):
+    if order == 'hilbert':
+        # Nodes without coordinates keep their relative order after the others
+        placed = [key for key in keys if key in node_data]
+        if not placed:
+            return keys
+        lons = [float(node_data[key]['lon']) for key in placed]
+        lats = [float(node_data[key]['lat']) for key in placed]
+        west, south = min(lons), min(lats)
+        scale = (HILBERT_SIDE - 1) / max(max(lons) - west, max(lats) - south, 1e-12)
+        curve = {key: hilbert_index(int((lon - west) * scale), int((lat - south) * scale))
+                 for key, lon, lat in zip(placed, lons, lats)}
+        return sorted(placed, key=curve.__getitem__) + [key for key in keys if key not in curve]
+    if order == 'bfs':
+        # Links are followed both ways, each disconnected part starting from its first key
+        neighbors = {key: [] for key in keys}
+        for key, links in adjacency.items():
+            for other in links:
+                neighbors[key].append(other)
+                neighbors[other].append(key)
+        ordered, visited = [], set()
+        for root in keys:
+            if root in visited:
+                continue
+            visited.add(root)
+            head = len(ordered)           # ordered[head:] is the queue
+            ordered.append(root)
+            while head < len(ordered):
+                for other in neighbors[ordered[head]]:
+                    if other not in visited:
+                        visited.add(other)
+                        ordered.append(other)
+                head += 1
+        return ordered
+    return keys
+
+
+# Position of grid cell (x, y) along the Hilbert curve filling a square of the given side
+def hilbert_index(x, y, grid=HILBERT_SIDE):
+    position = 0
+    side = grid // 2
+    while side:
+        rx = 1 if x & side else 0
+        ry = 1 if y & side else 0
+        position += side * side * ((3 * rx) ^ ry)
+        if not ry:  # Rotate the quadrant so the curve stays continuous
+            if rx:
+                x, y = grid - 1 - x, grid - 1 - y
+            x, y = y, x
+        side //= 2
+    return position
+
+
+# Strongly connected components of a CSR graph (iterative Tarjan) as a component
+# number by node id, numbered in topological order: no edge leads to a lower number
+def strongly_connected_components(offsets, targets):
+    nodes = len(offsets) - 1
+    order = array('i', [-1]) * nodes      # Discovery order, -1 until visited
+    low = array('i', [0]) * nodes
+    component = array('i', [-1]) * nodes
+    on_stack = bytearray(nodes)
+    stack, visited, found = [], 0, 0
+
+    for root in range(nodes):
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = visited
+        visited += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [[root, offsets[root]]]    # Nodes being explored with their next edge
+        while work:
+            frame = work[-1]
+            node, edge = frame
+            if edge < offsets[node + 1]:
+                frame[1] = edge + 1
+                neighbor = targets[edge]
+                if order[neighbor] < 0:
+                    order[neighbor] = low[neighbor] = visited
+                    visited += 1
+                    stack.append(neighbor)
+                    on_stack[neighbor] = 1
+                    work.append([neighbor, offsets[neighbor]])
+                elif on_stack[neighbor] and order[neighbor] < low[node]:
+                    low[node] = order[neighbor]
+                continue
+
+            work.pop()
+            if work and low[node] < low[work[-1][0]]:
+                low[work[-1][0]] = low[node]
+            if low[node] == order[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component[member] = found
+                    if member == node:
+                        break
+                found += 1
+
+    # Tarjan completes sink components first, so count down from the last one
+    for node in range(nodes):
+        component[node] = found - 1 - component[node]
+    return component
+
+
+# FROM_LARGEST/TO_LARGEST bits by node id for the components of a CSR graph
+# Flags are propagated along edges in component order: up for reaching the largest
+# component, down for being reached from it
+def largest_component_reach(offsets, targets, component):
+    nodes = len(component)
+    if not nodes:
+        return array('B')
+    count = max(component) + 1
+    sizes = [0] * count
+    for number in component:
+        sizes[number] += 1
+    largest = max(range(count), key=sizes.__getitem__)
+    by_component = sorted(range(nodes), key=component.__getitem__)
+
+    flags = bytearray(count)
+    flags[largest] = IN_LARGEST
+    for node in by_component:             # Ascending: reached from the largest one
+        if flags[component[node]] & FROM_LARGEST:
+            for edge in range(offsets[node], offsets[node + 1]):
+                flags[component[targets[edge]]] |= FROM_LARGEST
+    for node in reversed(by_component):   # Descending: reaching the largest one
+        for edge in range(offsets[node], offsets[node + 1]):
+            if flags[component[targets[edge]]] & TO_LARGEST:
+                flags[component[node]] |= TO_LARGEST
+                break
+    return array('B', [flags[number] for number in component])
+
+
+# Slot for a day type and hour of the day
+def time_slot(day_type, hour):
+    return (24 if day_type == 'weekend' else 0) + hour
+
+
+# Slot for a clock in hours since Monday 00:00
+def week_slot(clock):
+    hour = int(clock) % WEEK_HOURS
+    return time_slot('weekend' if hour >= 120 else 'weekday', hour % 24)
+
+
+# The SLOTS travel times of one edge from its adjacency.json entries
+# Entries without day_type/hour are taken in order, missing slots use the first entry
+def hourly_times(connection_data):
+    times = [connection_data[0]['time']] * SLOTS
+    for position, entry in enumerate(connection_data[:SLOTS]):
+        if 'hour' in entry:
+            times[time_slot(entry.get('day_type'), int(entry['hour']))] = entry['time']
+        else:
+            times[position] = entry['time']
+    return times
+
+
+# Load the road network json files into a Graph
+def load_graph(adjacency_path='adjacency.json', node_path='node_data.json', order='hilbert'):
+    with open(adjacency_path, 'r') as file:
+        adjacency = json.load(file)
+    with open(node_path, 'r') as file:
+        node_data = json.load(file)
+    return build_graph(adjacency, node_data, order)
@@ -0,0 +1,224 @@
+# Driver x passenger travel time structure maintained across matching events
+# Adding a driver costs one search to the waiting pickups, adding a passenger one
+# reverse search to the idle drivers; the global minimum pair comes off a heap
+# An optional PathCache skips searches for pairs that were already timed
+# With candidates (k) or radius_km set, only the nearest idle drivers and waiting
+# passengers by straight-line distance are timed, found through PointGrids
+# Rows added together (drivers or passengers turning up at the same time) can be
+# searched on an EtaPool of worker processes
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+from geo import euclidean_distance
+from graph import UNREACHABLE
+from spatial import PointGrid
+
+
+class CostMatrix:
+    etas = True                           # Costs are pickup travel times
+
+    def __init__(self, graph, cache=None, candidates=None, radius_km=None, pool=None):
+        self.graph = graph
+        self.cache = cache
+        self.pool = pool                  # Optional EtaPool for multi-row additions
+        self.candidates = candidates
+        self.radius_km = radius_km
+        self.pruned = candidates is not None or radius_km is not None
+        self.driver_grid = PointGrid()
+        self.passenger_grid = PointGrid()
+        self.time = 0                     # Time of the latest addition, for refills
+        self.pairs_timed = 0              # Driver-passenger travel times requested
+        self.searches = 0                 # One-to-many searches run for them
+        self.drivers = {}                 # driver -> (sequence, node id)
+        self.passengers = {}              # passenger -> (sequence, node id)
+        self.heap = []                    # (time, driver seq, passenger seq, driver, passenger)
+        self.sequence = count()           # Insertion order, breaks ties like the old index scan
+
+    def __len__(self):
+        return len(self.drivers) * len(self.passengers)
+
+    # Add rows for [(driver, node id)] in order; their searches are independent of each
+    # other and run in parallel when there is a pool
+    def add_drivers(self, entries, time=0):
+        self.time = time
+        rows = []
+        for driver, node in entries:
+            sequence = next(self.sequence)
+            self.drivers[driver] = (sequence, node)
+            rows.append((driver, self.nearby(self.passenger_grid, self.passengers, node)))
+            if self.pruned:
+                self.driver_grid.insert(driver, self.graph.lon[node], self.graph.lat[node])
+        self.add_rows(rows)
+
+    # Time each driver to the given waiting passengers' pickups, [(driver, passengers)]
+    def add_rows(self, rows):
+        found = self.travel_times(
+            [(self.drivers[driver][1], [self.passengers[passenger][1] for passenger in passengers])
+             for driver, passengers in rows], self.time)
+        for (driver, passengers), times in zip(rows, found):
+            sequence = self.drivers[driver][0]
+            for passenger in passengers:
+                passenger_sequence, pickup = self.passengers[passenger]
+                heappush(self.heap, (times[pickup], sequence, passenger_sequence, driver, passenger))
+
+    # Add columns for [(passenger, node id)] in order, like add_drivers
+    def add_passengers(self, entries, time=0):
+        self.time = time
+        columns = []
+        for passenger, node in entries:
+            sequence = next(self.sequence)
+            self.passengers[passenger] = (sequence, node)
+            columns.append((passenger, self.nearby(self.driver_grid, self.drivers, node)))
+            if self.pruned:
+                self.passenger_grid.insert(passenger, self.graph.lon[node], self.graph.lat[node])
+        self.add_columns(columns)
+
+    # Time the given drivers to each waiting passenger's pickup, [(passenger, drivers)]
+    def add_columns(self, columns):
+        found = self.travel_times(
+            [(self.passengers[passenger][1], [self.drivers[driver][1] for driver in drivers])
+             for passenger, drivers in columns], self.time, reverse=True)
+        for (passenger, drivers), times in zip(columns, found):
+            sequence = self.passengers[passenger][0]
+            for driver in drivers:
+                driver_sequence, position = self.drivers[driver]
+                heappush(self.heap, (times[position], driver_sequence, sequence, driver, passenger))
+
+    # Entries of a grid worth timing against a node: all of them unless pruning,
+    # else the k nearest and/or those within radius_km, closest first
+    def nearby(self, grid, entries, node):
+        if not self.pruned:
+            return list(entries)
+        lon, lat = self.graph.lon[node], self.graph.lat[node]
+        if self.radius_km is None:
+            found = grid.k_nearest(lon, lat, self.candidates)
+        else:
+            found = grid.within(lon, lat, self.radius_km)[:self.candidates]
+        return [entry[3] for entry in found]
+
+    # Travel times for rows [(node, others)] as one {other: time} per row, from node
+    # to each of others, or from each of others to node when reverse is set
+    # Cached pairs are not searched again, and with a pool the remaining searches
+    # of a multi-row call run in parallel
+    def travel_times(self, rows, time, reverse=False):
+        def pair(node, other):
+            return (other, node) if reverse else (node, other)
+
+        results, searches = [], []
+        for node, others in rows:
+            self.pairs_timed += len(others)
+            times, missing = {}, []
+            for other in others:
+                cached = None if self.cache is None else self.cache.get(*pair(node, other), time)
+                if cached is None:
+                    missing.append(other)
+                else:
+                    times[other] = cached
+            results.append(times)
+            if missing:
+                searches.append((node, missing, times))
+
+        self.searches += len(searches)
+        if self.pool is not None and len(searches) > 1:
+            found = self.pool.dijkstra_many(self.graph, [search[:2] for search in searches], reverse)
+        else:
+            graph = self.graph.reverse() if reverse else self.graph
+            found = [graph.dijkstra_many(node, missing) for node, missing, _ in searches]
+        for (node, _, times), travel_times in zip(searches, found):
+            for other, travel_time in travel_times.items():
+                if self.cache is not None:
+                    self.cache.put(*pair(node, other), time, travel_time)
+                times[other] = travel_time
+        return results
+
+    # Rows and columns are dropped lazily, their heap entries are skipped when popped
+    def remove_driver(self, driver):
+        del self.drivers[driver]
+        self.driver_grid.remove(driver)
+        self.compact()
+
+    def remove_passenger(self, passenger):
+        del self.passengers[passenger]
+        self.passenger_grid.remove(passenger)
+        self.compact()
+
+    # Remove and return the (driver, passenger, time) pair with the least travel time
+    # When pruning has left no candidate pairs although both sides are waiting, every
+    # passenger is timed against all idle drivers once
+    def pop_min(self):
+        while True:
+            while self.heap:
+                time, driver_sequence, passenger_sequence, driver, passenger = heappop(self.heap)
+                if (self.drivers.get(driver, (None,))[0] == driver_sequence and
+                        self.passengers.get(passenger, (None,))[0] == passenger_sequence):
+                    self.remove_driver(driver)
+                    self.remove_passenger(passenger)
+                    return driver, passenger, time
+            if not (self.pruned and self.drivers and self.passengers):
+                return None
+            self.time_against_all(list(self.passengers))
+
+    # Time the given passengers against every idle driver, with one search per driver
+    # or per passenger, whichever needs fewer
+    def time_against_all(self, passengers):
+        if len(self.drivers) < len(passengers):
+            self.add_rows([(driver, passengers) for driver in self.drivers])
+        else:
+            self.add_columns([(passenger, list(self.drivers)) for passenger in passengers])
+
+    # All live travel times as (drivers, passengers, times), times[i][j] being the
+    # time from drivers[i] to passengers[j]; both lists are in insertion order
+    # Pairs that pruning left untimed stay UNREACHABLE; like pop_min, only a passenger
+    # with no timed candidate left is timed against all idle drivers
+    def matrix(self):
+        if self.pruned:
+            covered = {passenger
+                       for _, driver_sequence, passenger_sequence, driver, passenger in self.heap
+                       if self.drivers.get(driver, (None,))[0] == driver_sequence and
+                       self.passengers.get(passenger, (None,))[0] == passenger_sequence}
+            uncovered = [passenger for passenger in self.passengers if passenger not in covered]
+            if uncovered and self.drivers:
+                self.time_against_all(uncovered)
+        drivers = sorted(self.drivers, key=lambda driver: self.drivers[driver][0])
+        passengers = sorted(self.passengers, key=lambda passenger: self.passengers[passenger][0])
+        rows = {driver: i for i, driver in enumerate(drivers)}
+        columns = {passenger: j for j, passenger in enumerate(passengers)}
+        times = [[UNREACHABLE] * len(passengers) for _ in drivers]
+        for time, driver_sequence, passenger_sequence, driver, passenger in self.heap:
+            if (self.drivers.get(driver, (None,))[0] == driver_sequence and
+                    self.passengers.get(passenger, (None,))[0] == passenger_sequence):
+                times[rows[driver]][columns[passenger]] = time
+        return drivers, passengers, times
+
+    # Rebuild the heap once stale entries outnumber the live ones
+    def compact(self):
+        if len(self.heap) <= 2 * len(self) + 64:
+            return
+        self.heap = [entry for entry in self.heap
+                     if self.drivers.get(entry[3], (None,))[0] == entry[1] and
+                     self.passengers.get(entry[4], (None,))[0] == entry[2]]
+        heapify(self.heap)
+
+
+# Pairs ranked by straight-line distance from the driver to the pickup (T2)
+# Costs are distances, so the pickup itself still has to be routed
+class StraightLineMatrix(CostMatrix):
+    etas = False
+
+    def travel_times(self, rows, time, reverse=False):
+        lon, lat = self.graph.lon, self.graph.lat
+        results = []
+        for node, others in rows:
+            self.pairs_timed += len(others)
+            results.append({other: euclidean_distance(lon[node], lat[node], lon[other], lat[other])
+                            for other in others})
+        return results
+
+
+# Pairs ranked by arrival order alone (T1): with every cost equal, the heap yields
+# the longest-idle driver and the longest-waiting passenger first
+class ArrivalOrder(CostMatrix):
+    etas = False
+
+    def travel_times(self, rows, time, reverse=False):
+        return [dict.fromkeys(others, 0) for _, others in rows]
@@ -0,0 +1,53 @@
+# Bounded LRU cache of shortest-path travel times
+# Keys are (source, target, time bucket) so cached times stay valid once edge
+# weights depend on the hour; popular pickup/dropoff pairs recur all day
+from collections import OrderedDict
+
+# Approximate memory per entry: key tuple, float value and OrderedDict link
+ENTRY_BYTES = 200
+
+
+class PathCache:
+    def __init__(self, max_bytes=32 << 20, bucket_hours=1):
+        self.capacity = max(1, max_bytes // ENTRY_BYTES)
+        self.bucket_hours = bucket_hours
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+        self.searches = 0                 # Searches run by lookup on a miss
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, source, target, time):
+        return source, target, int(time // self.bucket_hours)
+
+    # Cached travel time or None, counting the hit or miss
+    def get(self, source, target, time):
+        key = self.key(source, target, time)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, source, target, time, travel_time):
+        key = self.key(source, target, time)
+        self.entries[key] = travel_time
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    # Cached travel time, computing and storing it with search() on a miss
+    def lookup(self, source, target, time, search):
+        travel_time = self.get(source, target, time)
+        if travel_time is None:
+            self.searches += 1
+            travel_time = search()
+            self.put(source, target, time, travel_time)
+        return travel_time
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
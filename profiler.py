@@ -0,0 +1,123 @@
+# Opt-in instrumentation for the simulator's hot paths
+# Nothing is measured unless a Profiler is attached to a run: the engine then wraps
+# the functions it wants timed, so an unprofiled run executes exactly the same code
+# Timings go into power-of-two histograms and sizes are counted exactly; a JSON summary
+# is written at the end and, if asked for, JSON-line snapshots every few seconds while
+# the run goes on
+import json
+import time
+from collections import defaultdict
+from math import frexp
+
+
+# Sizes are small integers; below this they are counted exactly instead of bucketed
+EXACT_LIMIT = 1 << 16
+
+
+class Histogram:
+    # Counts of values in power-of-two buckets, or exactly for integers below
+    # EXACT_LIMIT, with exact count, total and max
+    def __init__(self):
+        self.buckets = defaultdict(int)   # Exponent e counts values in [2^(e-1), 2^e)
+        self.exact = defaultdict(int)     # Integer value -> count
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        if isinstance(value, int) and 0 <= value < EXACT_LIMIT:
+            self.exact[value] += 1
+        else:
+            self.buckets[frexp(value)[1] if value > 0 else -1074] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    # The q-th quantile: exact for integers below EXACT_LIMIT, else the lower bound of
+    # its bucket, so it is never above the true quantile and at most 2x below it
+    def quantile(self, q):
+        seen = 0
+        values = sorted([*self.exact.items(),
+                         *((2.0 ** (exponent - 1), count)
+                           for exponent, count in self.buckets.items())])
+        for value, count in values:
+            seen += count
+            if seen >= q * self.count:
+                return value
+        return self.max
+
+    # Count and statistics, values multiplied by scale (1e6 for seconds to us)
+    def summary(self, scale=1):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'total': round(self.total * scale, 3),
+            'mean': round(self.total * scale / self.count, 3),
+            'p50': round(self.quantile(0.5) * scale, 3),
+            'p90': round(self.quantile(0.9) * scale, 3),
+            'p99': round(self.quantile(0.99) * scale, 3),
+            'max': round(self.max * scale, 3),
+        }
+
+
+class Profiler:
+    # summary_path gets the JSON summary, snapshot_path a JSON line every interval seconds
+    def __init__(self, summary_path=None, snapshot_path=None, interval=10):
+        self.summary_path = summary_path
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.timings = defaultdict(Histogram)     # Seconds per call of wrapped functions
+        self.sizes = defaultdict(Histogram)       # Observed sizes, e.g. matching rounds
+        self.started = time.perf_counter()
+        self.next_snapshot = self.started + interval
+        if snapshot_path:
+            open(snapshot_path, 'w').close()
+
+    def observe(self, name, value):
+        self.sizes[name].add(value)
+
+    # Replace owner.attribute (a method) with a version that times every call
+    # The method is looked up on the class, so wrapping twice never nests timers
+    def wrap(self, owner, attribute, name):
+        function = getattr(type(owner), attribute).__get__(owner)
+        histogram = self.timings[name]
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.add(clock() - start)
+
+        setattr(owner, attribute, timed)
+
+    def due(self):
+        return self.snapshot_path is not None and time.perf_counter() >= self.next_snapshot
+
+    # Call counts, timings (us) and sizes plus the caller's gauges
+    def summary(self, gauges):
+        return {
+            'wall_s': round(time.perf_counter() - self.started, 3),
+            'gauges': gauges,
+            'timings_us': {name: histogram.summary(1e6)
+                           for name, histogram in sorted(self.timings.items())},
+            'sizes': {name: histogram.summary() for name, histogram in sorted(self.sizes.items())},
+        }
+
+    def snapshot(self, gauges):
+        self.next_snapshot = time.perf_counter() + self.interval
+        with open(self.snapshot_path, 'a') as file:
+            file.write(json.dumps(self.summary(gauges)) + '\n')
+
+    # Write the final summary (and a last snapshot) and return it
+    def finish(self, gauges):
+        summary = self.summary(gauges)
+        if self.snapshot_path:
+            self.snapshot(gauges)
+        if self.summary_path:
+            with open(self.summary_path, 'w') as file:
+                json.dump(summary, file, indent=2)
+        return summary
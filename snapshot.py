@@ -0,0 +1,151 @@
+# Binary snapshot of the road network
+# "Compiles" adjacency.json and node_data.json once into a flat file that later
+# runs open with mmap, so startup does no json parsing and every simulator
+# process on the host shares the same page cache
+#
+# Usage: python snapshot.py [adjacency.json] [node_data.json] [graph.snapshot] [order]
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from graph import Graph, SLOTS, load_graph
+
+MAGIC = b'NUBERGR\0'
+VERSION = 4
+
+# magic, version, slots, nodes, edges, key bytes,
+# then size, mtime and crc32 of adjacency.json and of node_data.json
+HEADER = struct.Struct('<8sIIqqq qqI qqI')
+ALIGN = 8
+
+
+# Size, modification time and crc32 of a source file
+def fingerprint(path):
+    stat = os.stat(path)
+    crc = 0
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            crc = zlib.crc32(chunk, crc)
+    return stat.st_size, stat.st_mtime_ns, crc
+
+
+# Arrays of the reversed graph, stored as sections named 'reverse_' + name, so column
+# searches in every process map them too instead of each building its own copy
+REVERSED = ('offsets', 'targets', 'weights', 'hourly', 'component', 'reach')
+
+
+# Sections of the snapshot in file order: (name, typecode, length)
+def layout(nodes, edges, key_bytes):
+    return [
+        ('lon', 'd', nodes),
+        ('lat', 'd', nodes),
+        ('offsets', 'i', nodes + 1),
+        ('targets', 'i', edges),
+        ('weights', 'd', edges),
+        ('hourly', 'f', SLOTS * edges),
+        ('component', 'i', nodes),
+        ('reach', 'B', nodes),
+        ('reverse_offsets', 'i', nodes + 1),
+        ('reverse_targets', 'i', edges),
+        ('reverse_weights', 'd', edges),
+        ('reverse_hourly', 'f', SLOTS * edges),
+        ('reverse_component', 'i', nodes),
+        ('reverse_reach', 'B', nodes),
+        ('keys', 'B', key_bytes),
+    ]
+
+
+# Write the snapshot for the given json files, nodes numbered in the given order
+# (graph.ORDERS); the snapshot's keys map the ids back to the json keys
+def compile_snapshot(adjacency_path='adjacency.json', node_path='node_data.json',
+                     snapshot_path='graph.snapshot', order='hilbert'):
+    graph = load_graph(adjacency_path, node_path, order)
+    reverse = graph.reverse()
+    keys = '\n'.join(graph.keys).encode()
+    header = HEADER.pack(MAGIC, VERSION, SLOTS, len(graph), len(graph.targets), len(keys),
+                         *fingerprint(adjacency_path), *fingerprint(node_path))
+
+    # Write to a temporary file first so readers never see a half-written snapshot
+    temporary_path = snapshot_path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(header)
+        for name, _, _ in layout(len(graph), len(graph.targets), len(keys)):
+            file.write(bytes(-file.tell() % ALIGN))
+            if name == 'keys':
+                file.write(keys)
+            elif name.startswith('reverse_'):
+                file.write(getattr(reverse, name[len('reverse_'):]).tobytes())
+            else:
+                file.write(getattr(graph, name).tobytes())
+    os.replace(temporary_path, snapshot_path)
+    return graph
+
+
+# True if the snapshot header still matches the json files it was compiled from
+# Sizes and mtimes are checked first, checksums only when those differ
+def is_fresh(header, adjacency_path, node_path):
+    recorded = (header[6:9], header[9:12])
+    for path, (size, mtime, crc) in zip((adjacency_path, node_path), recorded):
+        if not os.path.exists(path):
+            continue  # Snapshot shipped without its sources
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) == (size, mtime):
+            continue
+        if stat.st_size != size or fingerprint(path)[2] != crc:
+            return False
+    return True
+
+
+# Read and validate the header of a snapshot, None if it is missing or unusable
+def read_header(snapshot_path):
+    try:
+        with open(snapshot_path, 'rb') as file:
+            header = HEADER.unpack(file.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if header[0] != MAGIC or header[1] != VERSION or header[2] != SLOTS:
+        return None
+    return header
+
+
+# Map a snapshot into memory and wrap its sections in a Graph, and its reverse, without
+# copying
+def open_snapshot(snapshot_path='graph.snapshot'):
+    header = read_header(snapshot_path)
+    if header is None:
+        raise ValueError(f"{snapshot_path} is not a version {VERSION} graph snapshot")
+    nodes, edges, key_bytes = header[3:6]
+
+    with open(snapshot_path, 'rb') as file:
+        buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    sections = {}
+    position = HEADER.size
+    for name, typecode, length in layout(nodes, edges, key_bytes):
+        position += -position % ALIGN
+        size = length * struct.calcsize(typecode)
+        sections[name] = buffer[position:position + size].cast(typecode)
+        position += size
+
+    keys = bytes(sections.pop('keys')).decode().split('\n') if nodes else []
+    reversed_sections = {name: sections.pop('reverse_' + name) for name in REVERSED}
+    graph = Graph(keys, **sections)
+    graph.reverse_graph = Graph(keys, graph.lon, graph.lat, index=graph.index,
+                                **reversed_sections)
+    graph.reverse_graph.reverse_graph = graph
+    return graph
+
+
+# Open the snapshot, compiling it first if it is missing or stale
+def open_graph(adjacency_path='adjacency.json', node_path='node_data.json',
+               snapshot_path='graph.snapshot'):
+    header = read_header(snapshot_path)
+    if header is None or not is_fresh(header, adjacency_path, node_path):
+        compile_snapshot(adjacency_path, node_path, snapshot_path)
+    return open_snapshot(snapshot_path)
+
+
+if __name__ == "__main__":
+    compile_snapshot(*sys.argv[1:5])
@@ -0,0 +1,290 @@
+# Exact nearest-node queries over the road network nodes
+# Nodes are stored in a k-d tree over 3-D unit vectors: the straight-line (chord)
+# distance between unit vectors grows monotonically with the great-circle distance,
+# so the closest node in the tree is also the closest by haversine distance
+from array import array
+from heapq import heappush, heapreplace
+from math import radians, cos, sin, asin, sqrt, floor
+
+from geo import euclidean_distance, haversine_distance
+
+EARTH_RADIUS_KM = 6371
+
+# Length of one degree of latitude
+KM_PER_DEGREE = 111.19
+
+
+# Unit vector of a longitude/latitude pair
+def unit_vector(lon, lat):
+    lon, lat = radians(lon), radians(lat)
+    return cos(lat) * cos(lon), cos(lat) * sin(lon), sin(lat)
+
+
+# Great-circle distance in km for a squared chord length on the unit sphere
+def chord_to_km(chord_sq):
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(chord_sq) / 2))
+
+
+# Squared chord length on the unit sphere for a great-circle distance in km
+def km_to_chord(distance_km):
+    return (2 * sin(min(distance_km / EARTH_RADIUS_KM, 3.14159) / 2)) ** 2
+
+
+class SpatialIndex:
+    def __init__(self, nodes):
+        # nodes: iterable of (lon, lat, key) as produced by Graph.nodes()
+        nodes = list(nodes)
+        self.lon = array('d', (node[0] for node in nodes))
+        self.lat = array('d', (node[1] for node in nodes))
+        self.keys = [node[2] for node in nodes]
+        vectors = [unit_vector(node[0], node[1]) for node in nodes]
+        self.coords = [array('d', (vector[axis] for vector in vectors)) for axis in range(3)]
+
+        # Implicit balanced tree: the point splitting range [lo, hi) sits at (lo + hi) // 2
+        # and the bounding box of the range is stored at the same position
+        self.order = array('i', range(len(nodes)))
+        self.axis = array('b', bytes(len(nodes)))
+        self.low = [array('d', coords) for coords in self.coords]
+        self.high = [array('d', coords) for coords in self.coords]
+        self.build(0, len(nodes))
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Arrange order[lo:hi] so its median along the widest axis splits the range
+    def build(self, lo, hi):
+        stack = [(lo, hi)]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            points = self.order[lo:hi]
+            middle = (lo + hi) // 2
+            if hi - lo == 1:
+                for axis in range(3):
+                    self.low[axis][middle] = self.high[axis][middle] = self.coords[axis][points[0]]
+                continue
+
+            spreads = []
+            for axis, values in enumerate(self.coords):
+                self.low[axis][middle] = min(values[p] for p in points)
+                self.high[axis][middle] = max(values[p] for p in points)
+                spreads.append(self.high[axis][middle] - self.low[axis][middle])
+            axis = spreads.index(max(spreads))
+            self.order[lo:hi] = array('i', sorted(points, key=self.coords[axis].__getitem__))
+            self.axis[middle] = axis
+            stack.append((lo, middle))
+            stack.append((middle + 1, hi))
+
+    # Squared distance from the query to the bounding box of the range split at middle
+    def box_distance(self, query, middle):
+        total = 0.0
+        for axis in range(3):
+            low, high = self.low[axis][middle], self.high[axis][middle]
+            if query[axis] < low:
+                total += (low - query[axis]) ** 2
+            elif query[axis] > high:
+                total += (query[axis] - high) ** 2
+        return total
+
+    # Visit tree ranges in near-first order, skipping those whose bounding box is
+    # farther than bound() allows; calls visit(point, chord_sq) for every point reached
+    def search(self, query, bound, visit):
+        x, y, z = self.coords
+        order, axis = self.order, self.axis
+        stack = [(0, len(order))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            middle = (lo + hi) // 2
+            if self.box_distance(query, middle) > bound():
+                continue
+            point = order[middle]
+            dx, dy, dz = x[point] - query[0], y[point] - query[1], z[point] - query[2]
+            visit(point, dx * dx + dy * dy + dz * dz)
+
+            if (dx, dy, dz)[axis[middle]] > 0:  # Query is below the split, lower half first
+                stack.append((middle + 1, hi))
+                stack.append((lo, middle))
+            else:
+                stack.append((lo, middle))
+                stack.append((middle + 1, hi))
+
+    # (lon, lat, key) of the node closest to the given position
+    def nearest(self, lon, lat):
+        if not self.keys:
+            return 0, 0, -1
+        return self.result(self.nearest_point(unit_vector(lon, lat)))[1:]
+
+    # Tree position of the node closest to a unit vector
+    # A hint point close to the query tightens the bound from the first visit
+    def nearest_point(self, query, hint=-1):
+        best = [float('inf'), -1]
+
+        def visit(point, chord_sq):
+            if chord_sq < best[0]:
+                best[0], best[1] = chord_sq, point
+
+        if hint >= 0:
+            visit(hint, sum((self.coords[axis][hint] - query[axis]) ** 2 for axis in range(3)))
+        self.search(query, lambda: best[0], visit)
+        return best[1]
+
+    # Closest nodes for a batch of positions, as (lon, lat, key) in input order
+    # Repeated positions are looked up once, and the rest are visited in a spatially
+    # sorted order so each lookup starts from its predecessor's answer as a bound
+    def nearest_many(self, lons, lats):
+        if not self.keys:
+            return [(0, 0, -1)] * len(lons)
+        unique = list(set(zip(lons, lats)))
+        unique.sort(key=lambda position: (int(position[1] * 200), position[0]))
+
+        found = {}
+        point = -1
+        for lon, lat in unique:
+            point = self.nearest_point(unit_vector(lon, lat), point)
+            found[lon, lat] = (self.lon[point], self.lat[point], self.keys[point])
+        return [found[position] for position in zip(lons, lats)]
+
+    # The k closest nodes as (distance_km, lon, lat, key), closest first
+    def k_nearest(self, lon, lat, k):
+        heap = []  # Max-heap on chord length of the best k so far
+
+        def visit(point, chord_sq):
+            if len(heap) < k:
+                heappush(heap, (-chord_sq, point))
+            elif chord_sq < -heap[0][0]:
+                heapreplace(heap, (-chord_sq, point))
+
+        if k > 0:
+            self.search(unit_vector(lon, lat),
+                        lambda: -heap[0][0] if len(heap) == k else float('inf'), visit)
+        return [self.result(point, -negative_sq) for negative_sq, point in sorted(heap, reverse=True)]
+
+    # All nodes within radius_km as (distance_km, lon, lat, key), closest first
+    def within(self, lon, lat, radius_km):
+        limit = km_to_chord(radius_km)
+        found = []
+
+        def visit(point, chord_sq):
+            if chord_sq <= limit:
+                found.append((chord_sq, point))
+
+        self.search(unit_vector(lon, lat), lambda: limit, visit)
+        return [self.result(point, chord_sq) for chord_sq, point in sorted(found)]
+
+    def result(self, point, chord_sq=0.0):
+        return chord_to_km(chord_sq), self.lon[point], self.lat[point], self.keys[point]
+
+
+# Approximate closest-node lookups as T1-T4 did them: binary search for the position
+# in longitude order, then the closest of the nodes within 20 places of it
+class WindowIndex:
+    def __init__(self, nodes, distance=euclidean_distance):
+        # nodes: iterable of (lon, lat, key) as produced by Graph.nodes()
+        self.nodes = sorted(nodes, key=lambda node: node[0])
+        self.distance = distance
+
+    def __len__(self):
+        return len(self.nodes)
+
+    # (lon, lat, key) of the closest node in the window around the given position
+    def nearest(self, lon, lat):
+        nodes = self.nodes
+        if not nodes:
+            return 0, 0, -1
+        left, right = 0, len(nodes) - 1
+        while left < right:
+            middle = (left + right) // 2
+            if lon > nodes[middle][0]:
+                left = middle + 1
+            elif lon < nodes[middle][0]:
+                right = middle - 1
+            else:
+                left = right = middle
+        window = nodes[max(0, left - 20):min(len(nodes), right + 21)]
+        return min(window, key=lambda node: self.distance(node[0], node[1], lon, lat))
+
+    def nearest_many(self, lons, lats):
+        return [self.nearest(lon, lat) for lon, lat in zip(lons, lats)]
+
+
+# Nearest-item queries over a set of points that changes as the simulation runs,
+# such as idle drivers: items are bucketed into cell_deg x cell_deg cells and
+# searched ring by ring outwards from the query cell
+class PointGrid:
+    def __init__(self, cell_deg=0.01):
+        self.cell_deg = cell_deg
+        self.cells = {}                   # (column, row) -> {item: (lon, lat)}
+        self.items = {}                   # item -> (column, row)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def cell(self, lon, lat):
+        return floor(lon / self.cell_deg), floor(lat / self.cell_deg)
+
+    def insert(self, item, lon, lat):
+        self.remove(item)
+        cell = self.cell(lon, lat)
+        self.items[item] = cell
+        self.cells.setdefault(cell, {})[item] = (lon, lat)
+
+    def remove(self, item):
+        cell = self.items.pop(item, None)
+        if cell is not None:
+            del self.cells[cell][item]
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    # (distance_km, lon, lat, item) for the items in cells exactly rings cells away
+    def ring(self, lon, lat, center, rings):
+        column, row = center
+        if rings == 0:
+            cells = [center]
+        else:
+            cells = [(i, j) for i in range(column - rings, column + rings + 1)
+                     for j in (row - rings, row + rings)]
+            cells += [(i, j) for i in (column - rings, column + rings)
+                      for j in range(row - rings + 1, row + rings)]
+        for cell in cells:
+            for item, (item_lon, item_lat) in self.cells.get(cell, {}).items():
+                yield haversine_distance(lon, lat, item_lon, item_lat), item_lon, item_lat, item
+
+    # Lower bound in km on the distance to anything beyond the given number of rings
+    def ring_km(self, lat, rings):
+        degrees = max(0, rings) * self.cell_deg
+        return degrees * KM_PER_DEGREE * cos(radians(min(89.0, abs(lat) + degrees + self.cell_deg)))
+
+    # The k closest items as (distance_km, lon, lat, item), closest first
+    def k_nearest(self, lon, lat, k):
+        if k <= 0:
+            return []
+        center = self.cell(lon, lat)
+        found, rings = [], 0
+        while len(found) < len(self.items):
+            found.extend(self.ring(lon, lat, center, rings))
+            if len(found) >= k:
+                found.sort(key=lambda entry: entry[0])
+                if found[k - 1][0] <= self.ring_km(lat, rings):
+                    break
+            rings += 1
+        found.sort(key=lambda entry: entry[0])
+        return found[:k]
+
+    # All items within radius_km as (distance_km, lon, lat, item), closest first
+    def within(self, lon, lat, radius_km):
+        center = self.cell(lon, lat)
+        found, seen, rings = [], 0, 0
+        while seen < len(self.items) and self.ring_km(lat, rings - 1) <= radius_km:
+            for entry in self.ring(lon, lat, center, rings):
+                seen += 1
+                if entry[0] <= radius_km:
+                    found.append(entry)
+            rings += 1
+        found.sort(key=lambda entry: entry[0])
+        return found
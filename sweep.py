@@ -0,0 +1,102 @@
+# Monte Carlo replications of T5 over a sweep of continue_driving decay rates
+# Prints the mean and 95% confidence half-width of D1, D2 and rides per decay rate
+# Each replication gets its own seeded RNG (the same seeds for every decay value, so
+# differences between rows come from the parameter, not the draws). Replications run
+# on a process pool: the graph snapshot is memory-mapped by every worker and the
+# spatial index is built once in the parent and inherited, both read-only
+#
+# Usage: python sweep.py [replications] [--decay 0.3,0.5,0.7] [--workers N] [--seed S]
+#                        [any engine.py option, e.g. --limit N --largest-component]
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from math import sqrt
+from random import Random
+from statistics import mean, stdev
+
+from engine import Algorithm, positive_int
+from engine import add_simulation_arguments, check_simulation_options
+
+# The Algorithm of a worker process, reused for every replication it runs
+worker = None
+
+
+def start_worker(index, options):
+    global worker
+    worker = Algorithm(**options)
+    worker.node_index = index
+
+
+# One replication: (decay, seed) -> (decay, seed, D1 wait, D2 profit, rides)
+def replicate(task):
+    decay, seed = task
+    worker.rng, worker.decay = Random(seed), decay
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker.run()
+    return (decay, seed, *worker.metrics(), worker.total_rides)
+
+
+# Mean, standard deviation and 95% confidence half-width of a sample
+def summarize(values):
+    spread = stdev(values) if len(values) > 1 else 0.0
+    return mean(values), spread, 1.96 * spread / sqrt(len(values))
+
+
+# Run every (decay, seed) pair and return the results in task order
+def sweep(replications=100, decays=(0.5,), workers=None, seed=0, **options):
+    template = Algorithm(**options)
+    template.preprocess_nodes()
+    tasks = [(decay, seed + replication) for decay in decays for replication in range(replications)]
+    workers = min(workers or os.cpu_count(), len(tasks))
+    if workers <= 1:
+        start_worker(template.node_index, options)
+        return [replicate(task) for task in tasks]
+    with multiprocessing.Pool(workers, start_worker, (template.node_index, options)) as pool:
+        return pool.map(replicate, tasks, chunksize=max(1, len(tasks) // (4 * workers)))
+
+
+def report(results):
+    print(f"{'decay':>6}  {'runs':>4}  {'D1 wait':>22}  {'D2 profit':>22}  {'rides':>22}")
+    for decay in sorted({result[0] for result in results}):
+        rows = [result for result in results if result[0] == decay]
+        cells = []
+        for column in (2, 3, 4):
+            average, _, half_width = summarize([row[column] for row in rows])
+            cells.append(f"{average:12.2f} +- {half_width:7.2f}")
+        print(f"{decay:6g}  {len(rows):4d}  " + "  ".join(cells))
+
+
+# argparse type for a comma separated list of decay rates
+def decay_list(text):
+    try:
+        return [float(value) for value in text.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a comma separated list of numbers: {text}")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo replications of the simulation over decay rates",
+        epilog="The other options are those of engine.py and apply to every replication")
+    parser.add_argument('replications', nargs='?', type=positive_int, default=100)
+    parser.add_argument('--decay', type=decay_list, default=[0.5], dest='decays',
+                        help="continue_driving decay rates per hour, comma separated")
+    parser.add_argument('--workers', type=positive_int,
+                        help="processes for the replications (default: one per core)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first replication")
+    add_simulation_arguments(parser, replicated=True)
+    options = vars(parser.parse_args(arguments))
+    check_simulation_options(parser, options)
+
+    start = time.perf_counter()
+    results = sweep(options.pop('replications'), options.pop('decays'), options.pop('workers'),
+                    options.pop('seed'), **options)
+    report(results)
+    print(f"{len(results)} replications in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
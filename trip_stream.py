@@ -0,0 +1,50 @@
+# Streaming trip ingestion
+# Trip files are read lazily as the simulation clock reaches them: rows are parsed
+# with a fixed-format timestamp parser and snapped to road nodes one window at a
+# time, so only the look-ahead window is held in memory however long the file is
+import csv
+from itertools import islice
+
+# Rows read and snapped ahead of the simulation clock
+LOOKAHEAD = 1024
+
+
+# Simulation time of an 'MM/DD/YYYY HH:MM:SS' timestamp, in the units of convert_date
+# Zero-padded stamps are sliced directly, others such as '4/1/2014 0:11:00' are split
+def parse_time(text):
+    if len(text) == 19:
+        month, day, year = int(text[0:2]), int(text[3:5]), int(text[6:10])
+        hour, minute = int(text[11:13]), int(text[14:16])
+    else:
+        date, clock = text.split()
+        month, day, year = map(int, date.split('/'))
+        hour, minute = map(int, clock.split(':')[:2])
+    return year * 8760 + month * 730 + 24 * day + hour + minute / 60
+
+
+# Rows of a trip file after the header with the timestamp in column 0 parsed,
+# stopping after limit rows if one is given
+def read_rows(path, limit=None):
+    with open(path, newline='') as csv_file:
+        csv_reader = csv.reader(csv_file)
+        next(csv_reader, None)  # Skip header
+        for row in islice(csv_reader, limit):
+            row[0] = parse_time(row[0])
+            yield row
+
+
+# Rows with each (lat column, lon column) position snapped to its closest node
+# The (lon, lat, key) nodes are appended after the position columns, a window at a time
+def snapped_rows(rows, index, positions, window=LOOKAHEAD):
+    rows = iter(rows)
+    width = 1 + 2 * len(positions)
+    while True:
+        batch = list(islice(rows, window))
+        if not batch:
+            return
+        nodes = [index.nearest_many([float(row[lon]) for row in batch],
+                                    [float(row[lat]) for row in batch])
+                 for lat, lon in positions]
+        for row, *snapped in zip(batch, *nodes):
+            row[width:] = snapped
+        yield from batch